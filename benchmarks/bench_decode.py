@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Time decoding synthetic listings and deeply threaded discussions into Post,
+User and Group objects.
+
+Usage: python benchmarks/bench_decode.py [repeat]
+"""
+
+# System includes
+import os
+import sys
+import time
+import lxml.etree
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+def decode_thread(depth, repeat):
+    """
+    Returns the seconds taken to decode a thread of the specified depth.
+    """
+
+    # Parse the thread once, as API.view_posts would receive it
+    xml = lxml.etree.fromstring(server.post_xml(1, depth = depth))
+
+    # Decode it repeatedly
+    start = time.time()
+    for i in xrange(repeat):
+        tweetworks.Post(xml)
+    return (time.time() - start) / repeat
+
+def decode_listing(model, element, count):
+    """
+    Returns how many objects per second the specified model decodes from a
+    listing of count synthetic elements.
+    """
+
+    # Parse a listing of the elements once
+    xml = lxml.etree.fromstring("<items>%s</items>" %
+                                "".join([element(id) for id in
+                                         xrange(1, count + 1)]))
+
+    # Decode every item in it
+    start = time.time()
+    for item_xml in xml:
+        model(item_xml)
+    return count / (time.time() - start)
+
+def main():
+    # Read the options
+    repeat = 20
+    if len(sys.argv) > 1:
+        repeat = int(sys.argv[1])
+
+    # Time flat listings of each model
+    print "%6s %14s" % ("model", "objects/s")
+    for model, element in ((tweetworks.Post, server.post_xml),
+                           (tweetworks.User, server.user_xml),
+                           (tweetworks.Group, server.group_xml)):
+        print "%6s %14.0f" % (model.__name__,
+                              decode_listing(model, element, 500 * repeat))
+    print
+
+    # Time a range of thread depths
+    print "%6s %12s %14s" % ("depth", "ms/thread", "posts/s")
+    for depth in (1, 10, 25, 50, 100):
+        seconds = decode_thread(depth, repeat)
+        print "%6d %12.3f %14.0f" % (depth, seconds * 1000,
+                                     (depth + 1) / seconds)
+
+if __name__ == "__main__":
+    main()
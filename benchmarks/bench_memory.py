@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the memory held by the Post objects of a large synthetic crawl of a
+single group, with and without an identity map.
+
+Usage: python benchmarks/bench_memory.py [posts]
+"""
+
+# System includes
+import gc
+import os
+import sys
+import types
+import lxml.etree
+
+# tracemalloc is only available on newer Pythons
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+def crawl(count, identity_map):
+    """
+    Decodes count synthetic posts, 20 to a page like a real group crawl, and
+    returns them.
+    """
+
+    # Decode a page at a time, so only the objects outlive each page
+    posts = []
+    for first in xrange(1, count + 1, 20):
+        page = lxml.etree.fromstring("<posts>%s</posts>" % "".join(
+            [server.post_xml(id, users = 200)
+             for id in xrange(first, min(first + 20, count + 1))]))
+        posts.extend([tweetworks.Post(post_xml, identity_map)
+                      for post_xml in page])
+    return posts
+
+def deep_size(root):
+    """
+    Returns the total size in bytes of every distinct object reachable from
+    root, not counting classes and modules, for Pythons without tracemalloc.
+    """
+
+    # Walk the object graph, counting each object once
+    seen = set()
+    total = 0
+    stack = [root]
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ClassType,
+                                               types.ModuleType)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+        if hasattr(obj, "__slots__"):
+            stack.extend([getattr(obj, name) for name in obj.__slots__
+                          if hasattr(obj, name)])
+    return total
+
+def measure(count, identity_map):
+    """
+    Returns the bytes held by the posts of a crawl of count posts.
+    """
+
+    # Measure allocations directly where possible
+    if tracemalloc != None:
+        gc.collect()
+        tracemalloc.start()
+        posts = crawl(count, identity_map)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    # Otherwise add up the reachable objects
+    return deep_size(crawl(count, identity_map))
+
+def main():
+    # Read the options
+    count = 10000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    # Compare decoding with and without shared users and groups
+    print "posts: %d (%s)" % (count, ("sys.getsizeof",
+                                      "tracemalloc")[tracemalloc != None])
+    without = measure(count, None)
+    shared = measure(count, tweetworks.IdentityMap())
+    print "without identity map: %10.1f KB" % (without / 1024.0)
+    print "with identity map:    %10.1f KB" % (shared / 1024.0)
+    print "reduction:            %10.1f%%" % (100.0 * (without - shared) /
+                                              without)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Compare API request throughput with and without keep-alive connections.
+
+Usage: python benchmarks/bench_pool.py [requests]
+"""
+
+# System includes
+import os
+import sys
+import time
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+def requests_per_second(api, count):
+    """
+    Times count single-page group listings through the specified API.
+    """
+
+    start = time.time()
+    for i in xrange(count):
+        api.index_groups()
+    return count / (time.time() - start)
+
+def main():
+    # Read the options
+    count = 500
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    # Serve a single small page of groups
+    local = server.Server(groups = 5)
+    local.start()
+
+    # A new connection for every request, then pooled connections
+    before = requests_per_second(tweetworks.API("key", base_url = local.url(),
+                                                pool_size = 0), count)
+    after = requests_per_second(tweetworks.API("key", base_url = local.url()),
+                                count)
+
+    # Report
+    print "requests: %d" % count
+    print "new connection per request: %8.1f requests/s" % before
+    print "keep-alive pool:            %8.1f requests/s" % after
+    print "speedup:                    %8.2fx" % (after / before)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Time ingesting and querying synthetic posts in the local SQLite store.
+
+Usage: python benchmarks/bench_store.py [posts]
+"""
+
+# System includes
+import os
+import sys
+import time
+import lxml.etree
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+def main():
+    # Read the options
+    count = 100000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    # Decode one page of synthetic posts and reuse it with fresh IDs
+    page = [tweetworks.Post(post_xml) for post_xml in lxml.etree.fromstring(
+        "<posts>%s</posts>" % "".join([server.post_xml(id, group_id = id % 7,
+                                                       users = 200)
+                                       for id in xrange(1, 1001)]))]
+
+    # Ingest the posts a thousand at a time
+    store = tweetworks.Store()
+    start = time.time()
+    for first in xrange(0, count, 1000):
+        for i, post in enumerate(page):
+            post.id = first + i + 1
+        store.add_posts(page)
+    seconds = time.time() - start
+    print "ingested %d posts: %.1f s (%.0f posts/s)" % (count, seconds,
+                                                       count / seconds)
+
+    # Query by user and group
+    start = time.time()
+    for user_id in xrange(1, 101):
+        store.posts(user_id = user_id, group_id = 3, limit = 20)
+    print "user+group query: %.2f ms" % ((time.time() - start) * 10)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for the Tweetworks server, serving synthetic XML responses
+for benchmarking the Python API.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import re
+import socket
+import threading
+import time
+import urlparse
+import zlib
+import BaseHTTPServer
+import SocketServer
+
+def user_xml(id):
+    """
+    Returns a synthetic <user> element as a string.
+    """
+
+    return ("<user><id>%d</id><username>user%d</username>"
+            "<avatar_url>http://s3.amazonaws.com/avatars/%d.png</avatar_url>"
+            "<name>User Number %d</name><twitter_id>%d</twitter_id></user>"
+            % (id, id, id, id, 1000000 + id))
+
+def group_xml(id):
+    """
+    Returns a synthetic <group> element as a string.
+    """
+
+    return ("<group><id>%d</id><name>group%d</name><private/>"
+            "<description>Synthetic group number %d</description></group>"
+            % (id, id, id))
+
+def post_xml(id, group_id = 1, parent_id = None, depth = 0, users = 50):
+    """
+    Returns a synthetic <post> element as a string, with a chain of depth
+    nested replies beneath it.
+    """
+
+    # Nested replies, if any
+    if depth > 0:
+        posts = "<posts>%s</posts>" % post_xml(id + 1, group_id, id,
+                                               depth - 1, users)
+    else:
+        posts = "<posts><post/></posts>"
+
+    # The post itself
+    user_id = id % users + 1
+    return ("<post><id>%d</id><user_id>%d</user_id><group_id>%d</group_id>"
+            "<parent_id>%s</parent_id><twitter_id>%d</twitter_id><bingo/>"
+            "<body>Synthetic post number %d about nothing in particular</body>"
+            "<created>2009-06-19T12:%02d:%02d-04:00</created>"
+            "<replies>%d</replies>%s%s%s</post>"
+            % (id, user_id, group_id, ("", str(parent_id))[parent_id != None],
+               2000000 + id, id, (id / 60) % 60, id % 60, (0, 1)[depth > 0],
+               group_xml(group_id), user_xml(user_id), posts))
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers Tweetworks API requests with synthetic XML. Paginated listings
+    repeat their last page past the end, as Tweetworks does.
+    """
+
+    # Allow keep-alive connections
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # Don't let Nagle's algorithm delay small responses
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        # Discard the posted form data
+        length = int(self.headers.getheader("Content-Length") or 0)
+        self.rfile.read(length)
+        self.respond()
+
+    def respond(self):
+        # Split the URL into the path and the page number
+        url = urlparse.urlparse(self.path)
+        query = dict([(name, int(values[0])) for name, values
+                      in urlparse.parse_qs(url.query).items()])
+
+        # Build the response body, as slowly as asked
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        body = self.server.body(url.path, query)
+        if self.server.fail():
+            self.send_response(503)
+            body = "<error><text>Service unavailable</text></error>"
+        elif body == None:
+            self.send_response(404)
+            body = "<error><text>Not found</text></error>"
+        else:
+            self.send_response(200)
+
+        # Compress the body if asked to and the client accepts it; raw
+        # deflate is sent as "deflate", as some servers do
+        accepted = self.headers.getheader("Accept-Encoding")
+        self.server.accept_encoding = accepted
+        encoding = (self.server.compress or "").replace("raw ", "")
+        if encoding != "" and encoding in (accepted or ""):
+            if self.server.compress == "gzip":
+                wbits = 16 + zlib.MAX_WBITS
+            elif self.server.compress == "raw deflate":
+                wbits = -zlib.MAX_WBITS
+            else:
+                wbits = zlib.MAX_WBITS
+            compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header("Content-Encoding", encoding)
+
+        # Send the response
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output quiet
+        pass
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    A threaded stand-in Tweetworks server listening on a local port.
+
+    posts - int - How many posts each post listing contains
+    users - int - How many users each user listing contains
+    groups - int - How many groups each group listing contains
+    depth - int - How many nested replies /posts/view/N.xml returns
+    latency - float - Seconds to wait before answering each request
+    fail_every - int - If nonzero, every Nth request fails with a 503
+    compress - string - "gzip", "deflate" or "raw deflate" (deflate without
+                        the zlib wrapper) to compress responses for clients
+                        that accept it, or None
+
+    The Accept-Encoding header of the latest request, or None, is kept in
+    accept_encoding.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, posts = 200, users = 300, groups = 300, depth = 10, latency = 0.0, fail_every = 0, compress = None):
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", 0), Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.compress = compress
+        self.accept_encoding = None
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.posts = posts
+        self.users = users
+        self.groups = groups
+        self.depth = depth
+
+    def url(self):
+        """
+        Returns the base URL of this server, for API(base_url = ...).
+        """
+
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+    def start(self):
+        """
+        Serves requests on a background thread.
+        """
+
+        thread = threading.Thread(target = self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def fail(self):
+        """
+        Counts a request, and returns whether it should fail.
+        """
+
+        self.lock.acquire()
+        try:
+            self.requests += 1
+            return self.fail_every > 0 and self.requests % self.fail_every == 0
+        finally:
+            self.lock.release()
+
+    def page(self, total, per_page, page):
+        """
+        Returns the 1-based item ids on the specified page, repeating the last
+        page past the end of the listing.
+        """
+
+        last = max(1, (total + per_page - 1) / per_page)
+        page = min(max(page, 1), last)
+        return range((page - 1) * per_page + 1,
+                     min(page * per_page, total) + 1)
+
+    def body(self, path, query):
+        """
+        Returns the XML response for the specified path and query (page,
+        beforeId and afterId), or None.
+        """
+
+        # Read the query
+        page = query.get("page", 1)
+
+        # A single threaded discussion
+        match = re.match(r"^/posts/view/(\d+)\.xml$", path)
+        if match:
+            return "<posts>%s</posts>" % post_xml(int(match.group(1)),
+                                                  depth = self.depth)
+
+        # A new post
+        if path == "/posts/add.xml":
+            return post_xml(self.posts + 1)
+
+        # Post listings, newest (highest ID) first, 20 per page
+        if re.match(r"^/posts/.*(newest|updated)\.xml$", path):
+            newest = min(self.posts, query.get("beforeId", self.posts + 1) - 1)
+            oldest = max(1, query.get("afterId", 0) + 1)
+            ids = self.page(newest - oldest + 1, 20, page)
+            return "<posts>%s</posts>" % "".join([post_xml(newest - id + 1)
+                                                  for id in ids])
+
+        # User listings, 30 per page
+        if re.match(r"^/users/.*\.xml$", path):
+            ids = self.page(self.users, 30, page)
+            return "<users>%s</users>" % "".join([user_xml(id) for id in ids])
+
+        # Joining a group answers with just that group
+        if re.match(r"^/groups/join/.*\.xml$", path):
+            return "<groups>%s</groups>" % group_xml(1)
+
+        # Group listings, 30 per page
+        if re.match(r"^/groups/.*\.xml$", path):
+            ids = self.page(self.groups, 30, page)
+            return "<groups>%s</groups>" % "".join([group_xml(id)
+                                                    for id in ids])
+
+        # Anything else is unknown
+        return None
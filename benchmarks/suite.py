@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Run the standard benchmarks against a local stand-in server and record the
+results as JSON, optionally comparing them with an earlier run.
+
+Usage: python benchmarks/suite.py [options]
+       python benchmarks/suite.py --output new.json --compare old.json
+"""
+
+# System includes
+import os
+import sys
+import time
+import json
+import platform
+import optparse
+import lxml.etree
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+def best_of(repeat, function):
+    """
+    Calls function() repeat times, and returns the fastest and mean seconds
+    and the last result.
+    """
+
+    times = []
+    for i in xrange(repeat):
+        start = time.time()
+        result = function()
+        times.append(time.time() - start)
+    return min(times), sum(times) / len(times), result
+
+def record(results, name, unit, repeat, function):
+    """
+    Times the function, which returns how many units it processed, and
+    stores the timing under name.
+    """
+
+    best, mean, count = best_of(repeat, function)
+    results[name] = {"unit" : unit,
+                     "count" : count,
+                     "best_seconds" : best,
+                     "mean_seconds" : mean,
+                     "per_second" : count / best}
+    print "%-28s %10d %-8s %10.2f ms %12.0f/s" % (name, count, unit,
+                                                 best * 1000, count / best)
+
+def listing(element, count):
+    """
+    Returns a parsed listing of count synthetic elements.
+    """
+
+    return lxml.etree.fromstring("<items>%s</items>" %
+                                 "".join([element(id) for id in
+                                          xrange(1, count + 1)]))
+
+def run(options):
+    """
+    Runs every benchmark, and returns the results by name.
+    """
+
+    # Serve synthetic listings and threads
+    local = server.Server(posts = options.posts, users = options.users,
+                          groups = options.groups, depth = options.depth,
+                          latency = options.latency,
+                          compress = options.compress)
+    local.start()
+    api = tweetworks.API("key", base_url = local.url(),
+                         prefetch = options.prefetch,
+                         pool_size = options.prefetch + 1)
+    results = {}
+
+    # Decoding of already-parsed XML
+    for model, element, count in ((tweetworks.Post, server.post_xml, 2000),
+                                  (tweetworks.User, server.user_xml, 5000),
+                                  (tweetworks.Group, server.group_xml, 5000)):
+        xml = listing(element, count)
+        record(results, "decode_%s" % model.__name__.lower(), "objects",
+               options.repeat,
+               lambda: len([model(item_xml) for item_xml in xml]))
+    posts_xml = listing(server.post_xml, 2000)
+    record(results, "decode_post_batch", "posts", options.repeat,
+           lambda: tweetworks.PostBatch().read_xml(posts_xml))
+    thread = lxml.etree.fromstring(server.post_xml(1, depth = options.depth))
+    def decode_thread():
+        tweetworks.Post(thread)
+        return options.depth + 1
+    record(results, "decode_thread", "posts", options.repeat, decode_thread)
+
+    # Pagination through whole listings
+    record(results, "paginate_group_posts", "posts", options.repeat,
+           lambda: len(api.group_posts("group", all = True)))
+    record(results, "paginate_index_users", "users", options.repeat,
+           lambda: len(api.index_users(all = True)))
+    record(results, "paginate_search_groups", "groups", options.repeat,
+           lambda: len(api.search_groups("synthetic")))
+    record(results, "iterate_group_posts", "posts", options.repeat,
+           lambda: len(list(api.iter_group_posts("group"))))
+
+    # End-to-end single calls
+    record(results, "view_posts", "calls", options.repeat,
+           lambda: len([api.view_posts(id) for id in xrange(1, 51)]))
+    record(results, "index_groups", "calls", options.repeat,
+           lambda: len([api.index_groups() for i in xrange(50)]))
+    record(results, "add_posts", "calls", options.repeat,
+           lambda: len([api.add_posts("Benchmark", "group")
+                        for i in xrange(50)]))
+    record(results, "join_groups", "calls", options.repeat,
+           lambda: len([api.join_groups("group") for i in xrange(50)]))
+
+    # Per-request breakdown of a crawl
+    metrics = tweetworks.Metrics()
+    api.add_hook(metrics)
+    api.group_posts("group", all = True)
+    api.index_users(all = True)
+    api.remove_hook(metrics)
+    summary = metrics.summary()
+    for method in sorted(summary):
+        for field in ("latency", "parse_time", "decode_time", "wire_bytes",
+                      "bytes"):
+            results["%s_%s_p50" % (method, field)] = {
+                "unit" : ("seconds", "bytes")[field.endswith("bytes")],
+                "value" : summary[method][field]["p50"]}
+
+    # Clean up
+    api.pool.close()
+    local.shutdown()
+    return results
+
+def compare(old, new):
+    """
+    Prints the change in throughput of each benchmark in both runs.
+    """
+
+    print
+    print "%-28s %14s %14s %8s" % ("benchmark", "before", "after", "change")
+    for name in sorted(new):
+        if name not in old or "per_second" not in new[name]:
+            continue
+        before = old[name]["per_second"]
+        after = new[name]["per_second"]
+        print "%-28s %12.0f/s %12.0f/s %7.2fx" % (name, before, after,
+                                                 after / before)
+
+def main():
+    # Read the options
+    parser = optparse.OptionParser(usage = "%prog [options]")
+    parser.add_option("--posts", type = "int", default = 400,
+                      help = "posts in each post listing")
+    parser.add_option("--users", type = "int", default = 300,
+                      help = "users in each user listing")
+    parser.add_option("--groups", type = "int", default = 300,
+                      help = "groups in each group listing")
+    parser.add_option("--depth", type = "int", default = 50,
+                      help = "nested replies in each viewed thread")
+    parser.add_option("--latency", type = "float", default = 0.0,
+                      help = "seconds the server waits before each response")
+    parser.add_option("--prefetch", type = "int", default = 0,
+                      help = "pages to read ahead while crawling listings")
+    parser.add_option("--compress",
+                      choices = ["gzip", "deflate", "raw deflate"],
+                      help = "compress responses with gzip, deflate or raw "
+                             "deflate")
+    parser.add_option("--repeat", type = "int", default = 5,
+                      help = "runs of each benchmark; the fastest is kept")
+    parser.add_option("--output", metavar = "FILE",
+                      help = "write the results to FILE as JSON")
+    parser.add_option("--compare", metavar = "FILE",
+                      help = "compare with the results in FILE")
+    options, args = parser.parse_args()
+
+    # Run the benchmarks
+    results = run(options)
+
+    # Record them with enough context to compare runs
+    report = {"created" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python" : platform.python_version(),
+              "platform" : platform.platform(),
+              "lxml" : lxml.etree.__version__,
+              "options" : {"posts" : options.posts,
+                           "users" : options.users,
+                           "groups" : options.groups,
+                           "depth" : options.depth,
+                           "latency" : options.latency,
+                           "prefetch" : options.prefetch,
+                           "compress" : options.compress,
+                           "repeat" : options.repeat},
+              "results" : results}
+    if options.output != None:
+        output = open(options.output, "w")
+        try:
+            json.dump(report, output, indent = 2, sort_keys = True)
+        finally:
+            output.close()
+
+    # Compare with an earlier run
+    if options.compare != None:
+        previous = open(options.compare)
+        try:
+            compare(json.load(previous)["results"], results)
+        finally:
+            previous.close()
+
+if __name__ == "__main__":
+    main()
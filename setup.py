@@ -53,7 +53,7 @@ setup(
 
     # Dependencies
     install_requires = [
-        "lxml>=2.2",
+        "lxml>=3.1",
         "iso8601>=0.1.4",
         ],
     setup_requires = [
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for tweetworks.AsyncAPI against the local stand-in server.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import gc
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Run against the working copy of the package and the stand-in server
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+# Tweetworks includes
+import tweetworks
+from tweetworks.AsyncAPI import _BackgroundIterator
+import server
+
+class CountingServer(server.Server):
+    """
+    A stand-in server that answers slowly and records how many requests it
+    was answering at once.
+    """
+
+    def __init__(self, delay = 0.02, **options):
+        server.Server.__init__(self, **options)
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.answered = 0
+
+    def body(self, path, query):
+        # Count the request in
+        self.lock.acquire()
+        try:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        finally:
+            self.lock.release()
+
+        # Answer slowly, so that concurrent requests overlap
+        try:
+            time.sleep(self.delay)
+            return server.Server.body(self, path, query)
+        finally:
+            self.lock.acquire()
+            try:
+                self.in_flight -= 1
+                self.answered += 1
+            finally:
+                self.lock.release()
+
+class AsyncAPITest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = CountingServer(posts = 100)
+        self.server.start()
+        self.api = tweetworks.AsyncAPI("key", base_url = self.server.url(),
+                                       max_concurrency = 2, buffer_size = 20)
+
+    def tearDown(self):
+        self.api.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_futures_match_api(self):
+        # The same objects as the synchronous API
+        api = tweetworks.API("key", base_url = self.server.url())
+        expected = [str(post) for post in api.group_posts("g")]
+        api.pool.close()
+        future = self.api.group_posts("g")
+        self.assertEqual([str(post) for post in future.result(10)], expected)
+
+    def test_iterator_matches_api(self):
+        # Every post of the listing, in order
+        api = tweetworks.API("key", base_url = self.server.url())
+        expected = [post.id for post in api.iter_group_posts("g")]
+        api.pool.close()
+        posts = list(self.api.iter_group_posts("g"))
+        self.assertEqual(len(posts), 100)
+        self.assertEqual([post.id for post in posts], expected)
+
+    def test_iterators_share_concurrency_bound(self):
+        # Ten iterators, each several pages long, consumed side by side
+        iterators = [self.api.iter_group_posts("g") for i in range(10)]
+        counts = [0] * len(iterators)
+        finished = set()
+        while len(finished) < len(iterators):
+            for index, iterator in enumerate(iterators):
+                if index in finished:
+                    continue
+                try:
+                    iterator.next()
+                    counts[index] += 1
+                except StopIteration:
+                    finished.add(index)
+
+        # Every iterator finished, and never more than two requests at once
+        self.assertEqual(counts, [100] * len(iterators))
+        self.assertTrue(self.server.peak <= 2, self.server.peak)
+
+    def test_iterators_start_no_threads(self):
+        # Start ten iterators
+        iterators = [self.api.iter_group_posts("g") for i in range(10)]
+        for iterator in iterators:
+            iterator.next()
+
+        # Only the pool's threads run on our side, not one per iterator
+        client_threads = [thread for thread in threading.enumerate()
+                          if thread is not threading.current_thread() and
+                          getattr(thread._Thread__target, "im_self",
+                                  None) is not self.server]
+        for iterator in iterators:
+            iterator.close()
+        self.assertTrue(len(client_threads) <= 2, client_threads)
+
+    def test_close_stops_fetching(self):
+        # Read one post, then give up on the rest
+        iterator = self.api.iter_group_posts("g")
+        iterator.next()
+        iterator.close()
+        self.assertRaises(StopIteration, iterator.next)
+
+        # No more pages are requested
+        time.sleep(0.2)
+        answered = self.server.answered
+        time.sleep(0.2)
+        self.assertEqual(self.server.answered, answered)
+        self.assertTrue(answered < 5, answered)
+
+    def test_errors_are_raised(self):
+        # A failed page surfaces from the iterator
+        self.server.fail_every = 2
+        iterator = self.api.iter_group_posts("g")
+        self.assertRaises(tweetworks.API.TweetworksException, list, iterator)
+
+class BackgroundIteratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workers = tweetworks.WorkerPool(1)
+        self.cleaned_up = threading.Event()
+
+    def tearDown(self):
+        self.workers.shutdown()
+
+    def source(self):
+        # An endless generator that records when its cleanup runs
+        try:
+            count = 0
+            while True:
+                count += 1
+                yield count
+        finally:
+            self.cleaned_up.set()
+
+    def test_close_closes_source(self):
+        iterator = _BackgroundIterator(self.source(), 5, self.workers)
+        self.assertEqual([iterator.next() for i in range(3)], [1, 2, 3])
+        iterator.close()
+        self.assertTrue(self.cleaned_up.wait(5))
+
+    def test_abandoned_iterator_is_cleaned_up(self):
+        iterator = _BackgroundIterator(self.source(), 5, self.workers)
+        self.assertEqual(iterator.next(), 1)
+
+        # Let the pulling task finish, so that only we hold the iterator
+        time.sleep(0.1)
+        del iterator
+        gc.collect()
+        self.assertTrue(self.cleaned_up.wait(5))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for compressed responses against the local stand-in server.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import os
+import sys
+import unittest
+
+# Run against the working copy of the package and the stand-in server
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+class CompressionTest(unittest.TestCase):
+
+    def fetch(self, compress, api_compress = True):
+        """
+        Reads a post listing, a threaded discussion and a user listing from a
+        server compressing with the specified encoding, and returns them as
+        strings along with the instrumentation events.
+        """
+
+        # Serve compressed responses
+        local = server.Server(posts = 40, compress = compress)
+        local.start()
+
+        # Read through an API recording every request
+        api = tweetworks.API("key", base_url = local.url(),
+                             compress = api_compress)
+        events = []
+        api.add_hook(events.append)
+        try:
+            objects = [str(post) for post in api.group_posts("g", all = True)]
+            objects.append(str(api.view_posts(1)))
+            objects.extend([str(user) for user in api.index_users()])
+            return objects, events, local.accept_encoding
+        finally:
+            api.pool.close()
+            local.shutdown()
+            local.server_close()
+
+    def check(self, compress):
+        # The same objects as without compression
+        expected, plain_events, accepted = self.fetch(None)
+        objects, events, accepted = self.fetch(compress)
+        self.assertEqual(objects, expected)
+
+        # Each response was smaller on the wire than once decoded
+        self.assertEqual(len(events), len(plain_events))
+        for event in events:
+            self.assertTrue(event["wire_bytes"] < event["bytes"], event)
+        self.assertEqual([event["bytes"] for event in events],
+                         [event["bytes"] for event in plain_events])
+
+    def test_gzip(self):
+        self.check("gzip")
+
+    def test_deflate(self):
+        self.check("deflate")
+
+    def test_raw_deflate(self):
+        self.check("raw deflate")
+
+    def test_uncompressed(self):
+        # Asking for compression is harmless when the server doesn't
+        objects, events, accepted = self.fetch(None)
+        self.assertTrue("gzip" in accepted, accepted)
+        for event in events:
+            self.assertEqual(event["wire_bytes"], event["bytes"])
+
+    def test_compression_off(self):
+        # No compressed encoding is accepted (httplib itself always sends
+        # "identity"), so nothing comes back compressed
+        expected, plain_events, accepted = self.fetch(None)
+        objects, events, accepted = self.fetch("gzip", api_compress = False)
+        self.assertTrue(accepted in (None, "identity"), accepted)
+        self.assertEqual(objects, expected)
+        for event in events:
+            self.assertEqual(event["wire_bytes"], event["bytes"])
+
+if __name__ == "__main__":
+    unittest.main()
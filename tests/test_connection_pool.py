@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for tweetworks.KeepAliveHandler against the local stand-in server.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import os
+import sys
+import time
+import unittest
+
+# Run against the working copy of the package and the stand-in server
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+class HangingUpHandler(server.Handler):
+    """
+    Answers like the stand-in server, but can hang up after each response
+    without saying so, as a server closing idle connections does.
+    """
+
+    def respond(self):
+        server.Handler.respond(self)
+        if self.server.hang_up:
+            self.close_connection = 1
+
+class CountingServer(server.Server):
+    """
+    A stand-in server that counts the requests for each path, and can answer
+    new posts slowly.
+    """
+
+    def __init__(self, add_delay = 0.0, **options):
+        server.Server.__init__(self, **options)
+        self.RequestHandlerClass = HangingUpHandler
+        self.add_delay = add_delay
+        self.hang_up = False
+        self.paths = {}
+
+    def body(self, path, query):
+        self.lock.acquire()
+        try:
+            self.paths[path] = self.paths.get(path, 0) + 1
+        finally:
+            self.lock.release()
+        if path == "/posts/add.xml":
+            time.sleep(self.add_delay)
+        return server.Server.body(self, path, query)
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up on us; that's expected
+        pass
+
+class KeepAliveHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = CountingServer(add_delay = 0.6, groups = 5)
+        self.server.start()
+        self.api = tweetworks.API("key", "user", "password",
+                                  base_url = self.server.url(),
+                                  timeout = 0.3)
+
+    def tearDown(self):
+        self.api.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_stale_connections_are_replaced(self):
+        # Every request after the first finds its pooled connection closed
+        self.server.hang_up = True
+        for i in range(5):
+            self.assertEqual(len(self.api.index_groups()), 5)
+        self.server.add_delay = 0.0
+        self.api.add_posts("Hello")
+
+        # Each request still reached the server exactly once
+        self.assertEqual(self.server.paths["/groups/index.xml"], 5)
+        self.assertEqual(self.server.paths["/posts/add.xml"], 1)
+
+    def test_timed_out_post_is_not_resent(self):
+        # Warm up the pool, then time out while the post is being added
+        self.api.index_groups()
+        self.assertRaises(Exception, self.api.add_posts, "Hello")
+
+        # The post was only sent once
+        time.sleep(1.0)
+        self.assertEqual(self.server.paths["/posts/add.xml"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
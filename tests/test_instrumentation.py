@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for API instrumentation hooks against the local stand-in server.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import os
+import sys
+import time
+import unittest
+
+# Run against the working copy of the package and the stand-in server
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+# Tweetworks includes
+import tweetworks
+import server
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = server.Server(posts = 100)
+        self.server.start()
+        self.apis = []
+
+    def tearDown(self):
+        for api in self.apis:
+            api.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def api(self, **options):
+        # An API recording every event
+        api = tweetworks.API("key", base_url = self.server.url(), **options)
+        api.events = []
+        api.add_hook(api.events.append)
+        self.apis.append(api)
+        return api
+
+    def test_crawl_reports_every_request(self):
+        # Five full pages, then the repeated last page that ends the crawl
+        api = self.api()
+        posts = api.group_posts("g", all = True)
+        self.assertEqual(len(posts), 100)
+        self.assertEqual(len(api.events), self.server.requests)
+        self.assertEqual([event["objects"] for event in api.events],
+                         [20] * 5 + [0])
+        self.assertEqual([event["error"] for event in api.events],
+                         [None] * 6)
+        self.assertTrue(api.events[-1]["bytes"] > 0)
+
+    def test_cursor_crawl_reports_every_request(self):
+        api = self.api()
+        posts = api.group_posts("g", all = True, cursor = True)
+        self.assertEqual(len(posts), 100)
+        self.assertEqual(len(api.events), self.server.requests)
+        self.assertEqual(sum([event["objects"] for event in api.events]), 100)
+
+    def test_dropped_prefetches_are_reported(self):
+        api = self.api(prefetch = 3)
+        posts = api.group_posts("g", all = True)
+        self.assertEqual(len(posts), 100)
+
+        # Wait for the read-ahead past the end to come back
+        deadline = time.time() + 5
+        while len(api.events) < self.server.requests and \
+              time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(api.events), self.server.requests)
+        self.assertEqual(api.crawl_stats["requests_wasted"],
+                         len([event for event in api.events
+                              if event["objects"] == 0]) - 1)
+
+    def test_post_batch_counts_posts(self):
+        # Each page's batch is counted by its posts
+        api = self.api()
+        batch = api.post_batch("group", "g", all = True)
+        self.assertEqual(len(batch), 100)
+        self.assertEqual([event["objects"] for event in api.events],
+                         [20] * 5 + [0])
+
+    def test_failures_are_reported(self):
+        # Every other request fails with a 503
+        self.server.fail_every = 2
+        api = self.api()
+        metrics = tweetworks.Metrics()
+        api.add_hook(metrics)
+        api.index_groups()
+        self.assertRaises(tweetworks.API.TweetworksException,
+                          api.index_groups)
+        self.assertEqual(len(api.events), 2)
+        self.assertEqual(api.events[0]["error"], None)
+        self.assertTrue(isinstance(api.events[1]["error"],
+                                   tweetworks.API.TweetworksException))
+        summary = metrics.summary()["index_groups"]
+        self.assertEqual((summary["requests"], summary["errors"]), (2, 1))
+
+if __name__ == "__main__":
+    unittest.main()
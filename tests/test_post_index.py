@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for tweetworks.PostIndex.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import os
+import sys
+import unittest
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+
+# Tweetworks includes
+import tweetworks
+
+class PostIndexTest(unittest.TestCase):
+
+    def post(self, id, body, minute, group_id = None, user_id = 1):
+        # A post created the specified number of minutes into the day
+        post = tweetworks.Post()
+        post.id = id
+        post.body = body
+        post.group_id = group_id
+        post.user_id = user_id
+        post.created = tweetworks.Timestamp.DEFAULT.parse(
+            "2009-06-19T12:%02d:00-04:00" % minute)
+        return post
+
+    def setUp(self):
+        # Added newest first, so the numbers start out of creation order
+        self.index = tweetworks.PostIndex()
+        self.index.add([self.post(5, u"black and white", 50, 1),
+                        self.post(4, u"bread or butter", 40, 2),
+                        self.post(3, u"white bread", 30, 1, 2)])
+        self.index.add([self.post(2, u"and then there were none", 20),
+                        self.post(1, u"black bread and butter", 10, 2, 2)])
+
+    def search(self, query, **filters):
+        # Search both before and after compacting
+        results = self.index.search(query, **filters)
+        self.index.compact()
+        self.assertEqual(self.index.search(query, **filters), results)
+        return results
+
+    def test_words(self):
+        self.assertEqual(self.search("bread"), [4, 3, 1])
+        self.assertEqual(self.search("bread butter"), [4, 1])
+        self.assertEqual(self.search("bread AND butter"), [4, 1])
+        self.assertEqual(self.search("bread butter", limit = 1), [4])
+
+    def test_lowercase_operators_are_words(self):
+        self.assertEqual(self.search("and"), [5, 2, 1])
+        self.assertEqual(self.search("or"), [4])
+        self.assertEqual(self.search("black and"), [5, 1])
+
+    def test_or(self):
+        self.assertEqual(self.search("none OR white"), [5, 3, 2])
+        self.assertEqual(self.search("none OR white", limit = 2), [5, 3])
+
+    def test_phrases(self):
+        self.assertEqual(self.search('"black and"'), [5])
+        self.assertEqual(self.search('"bread and butter"'), [1])
+
+    def test_filters(self):
+        self.assertEqual(self.search("bread", group_id = 2), [4, 1])
+        self.assertEqual(self.search("bread", user_id = 2), [3, 1])
+        since = tweetworks.Timestamp.DEFAULT.parse("2009-06-19T12:15:00-04:00")
+        until = tweetworks.Timestamp.DEFAULT.parse("2009-06-19T12:45:00-04:00")
+        self.assertEqual(self.search("bread", since = since), [4, 3])
+        self.assertEqual(self.search("", since = since, until = until),
+                         [4, 3, 2])
+
+    def test_filters_alone(self):
+        self.assertEqual(self.search("", group_id = 1), [5, 3])
+        self.assertEqual(self.search("", user_id = 2, limit = 1), [3])
+        self.assertEqual(self.search(""), [5, 4, 3, 2, 1])
+        self.assertEqual(self.search("!!!", group_id = 1), [])
+
+    def test_changes(self):
+        # A changed post is found by its new body only, and removed posts
+        # aren't found at all
+        self.index.add([self.post(3, u"brown toast", 30, 1, 2)])
+        self.index.remove([1])
+        self.assertEqual(self.search("bread"), [4])
+        self.assertEqual(self.search("toast"), [3])
+        self.assertEqual(len(self.index), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for tweetworks.Threads.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import os
+import sys
+import unittest
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+
+# Tweetworks includes
+import tweetworks
+
+def post(id, parent_id = None, posts = []):
+    # A post with just the fields threading uses
+    post = tweetworks.Post()
+    post.id = id
+    post.parent_id = parent_id
+    post.posts = list(posts)
+    return post
+
+class FakeAPI:
+    """
+    Answers view_posts from a dict of discussions by requested ID, counting
+    the requests.
+    """
+
+    TweetworksException = tweetworks.API.TweetworksException
+    max_workers = 1
+
+    def __init__(self, discussions):
+        self.discussions = discussions
+        self.requests = []
+
+    def view_posts(self, id):
+        self.requests.append(id)
+        if id not in self.discussions:
+            raise self.TweetworksException("Not found")
+        return self.discussions[id]()
+
+class ThreadsTest(unittest.TestCase):
+
+    def test_links_replies(self):
+        threads = tweetworks.Threads([post(3, 1), post(1), post(2, 1),
+                                      post(4)])
+        self.assertEqual([root.id for root in threads.roots], [4, 1])
+        self.assertEqual([reply.id for reply in threads.posts[1].posts],
+                         [2, 3])
+        self.assertEqual(threads.posts[1].replies, 2)
+
+    def test_fetches_missing_parents(self):
+        # Post 3 replies to 2, which replies to 1
+        api = FakeAPI({2 : lambda: post(2, 1),
+                       1 : lambda: post(1, None, [post(2, 1)])})
+        threads = tweetworks.Threads([post(3, 2)])
+        self.assertEqual(threads.fetch_missing(api), 2)
+        self.assertEqual([root.id for root in threads.roots], [1])
+        self.assertEqual(threads.unresolved, set())
+
+    def test_unfetchable_parents_are_unresolved(self):
+        api = FakeAPI({})
+        threads = tweetworks.Threads([post(3, 2)])
+        self.assertEqual(threads.fetch_missing(api), 1)
+        self.assertEqual(threads.unresolved, set([2]))
+
+    def test_discussion_without_parent_is_unresolved(self):
+        # Asking for the reply 2 answers with its thread root, without it
+        api = FakeAPI({2 : lambda: post(1)})
+        threads = tweetworks.Threads([post(3, 2)])
+        self.assertEqual(threads.fetch_missing(api), 1)
+        self.assertEqual(api.requests, [2])
+        self.assertEqual(threads.unresolved, set([2]))
+        self.assertEqual(threads.missing_parent_ids(), set())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for tweetworks.Timestamp.
+
+Usage: python -m unittest discover -s tests
+"""
+
+# System includes
+import os
+import sys
+import unittest
+import iso8601
+
+# Run against the working copy of the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+
+# Tweetworks includes
+import tweetworks
+
+class TimestampTest(unittest.TestCase):
+
+    # Timestamps iso8601 reads
+    VALID = ["2009-06-19T12:00:10-04:00", "2009-06-19T12:00:10Z",
+             "2009-06-19T12:00:10+14:30", "2009-06-19 12:00:10Z",
+             "2009-06-19T12:00:10.5Z", "2009-06-19T12:00Z"]
+
+    # Timestamps iso8601 rejects, many in the fast path's layout
+    INVALID = ["2009-06-19T12: 0:10Z", "2009-13-19T12:00:10Z",
+               "2009-02-30T12:00:10Z", "2009-06-19T24:00:10Z",
+               "2009-06-19T12:60:10Z", "2009-06-19T12:00:60Z",
+               "2009-06-19T12:00:10+-4:00", "+009-06-19T12:00:10Z",
+               "0000-06-19T12:00:10Z", u"200٣-06-19T12:00:10Z",
+               "not a timestamp"]
+
+    def setUp(self):
+        self.timestamp = tweetworks.Timestamp()
+
+    def test_same_as_iso8601(self):
+        for text in TimestampTest.VALID:
+            expected = iso8601.parse_date(text)
+            self.assertEqual(self.timestamp.parse(text), expected)
+            self.assertEqual(self.timestamp.parse(text).utcoffset(),
+                             expected.utcoffset())
+            self.assertEqual(self.timestamp.parse_many([text], epoch = True),
+                             [self.timestamp.epoch(expected)])
+
+    def test_invalid_timestamps_raise_parse_errors(self):
+        for text in TimestampTest.INVALID:
+            self.assertRaises(iso8601.ParseError, self.timestamp.parse, text)
+            self.assertRaises(iso8601.ParseError, self.timestamp.parse_many,
+                              [text], True)
+
+    def test_epoch_round_trip(self):
+        parsed = self.timestamp.parse("2009-06-19T12:00:10-04:00")
+        epoch = self.timestamp.epoch(parsed)
+        self.assertEqual(self.timestamp.from_epoch(epoch), parsed)
+
+if __name__ == "__main__":
+    unittest.main()
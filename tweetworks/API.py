@@ -40,13 +40,95 @@ The term "Twitter" is Copyright © 2009 Twitter, Inc.
 # System includes
 import sys
 import os
+import re
+import random
+import socket
+import httplib
+import time
 import urllib
 import urllib2
+import urlparse
+import threading
+import zlib
 import lxml.etree
 
 # Tweetworks includes
 import tweetworks
 
+class _CountingReader:
+    """
+    Wraps a response file object, counting the bytes read from it.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.bytes = 0
+
+    def read(self, size = -1):
+        data = self.fp.read(size)
+        self.bytes += len(data)
+        return data
+
+    def close(self):
+        self.fp.close()
+
+class _DecompressingReader:
+    """
+    Wraps a gzip or deflate encoded response file object, decompressing it
+    a chunk at a time as it is read and counting the decoded bytes.
+    """
+
+    # How much compressed data to read at once
+    CHUNK_SIZE = 16384
+
+    def __init__(self, fp, encoding):
+        self.fp = fp
+        self.bytes = 0
+        self.__buffer = ""
+        self.__finished = False
+
+        # gzip has a header and trailer; deflate should be zlib-wrapped, but
+        # some servers send it raw, which is detected on the first chunk
+        if encoding == "gzip":
+            self.__decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self.__decompressor = None
+
+    def read(self, size = -1):
+        # Decompress until we have enough, or the body ends
+        while not self.__finished and (size < 0 or
+                                       len(self.__buffer) < size):
+            chunk = self.fp.read(_DecompressingReader.CHUNK_SIZE)
+            if chunk == "":
+                if self.__decompressor != None:
+                    self.__buffer += self.__decompressor.flush()
+                self.__finished = True
+            else:
+                self.__buffer += self.__decompress(chunk)
+
+        # Hand over the requested amount
+        if size < 0 or size >= len(self.__buffer):
+            data = self.__buffer
+            self.__buffer = ""
+        else:
+            data = self.__buffer[:size]
+            self.__buffer = self.__buffer[size:]
+        self.bytes += len(data)
+        return data
+
+    def __decompress(self, chunk):
+        # Pick the deflate flavor from the first chunk
+        if self.__decompressor == None:
+            self.__decompressor = zlib.decompressobj()
+            try:
+                return self.__decompressor.decompress(chunk)
+            except zlib.error:
+                self.__decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self.__decompressor.decompress(chunk)
+
+    def close(self):
+        self.fp.close()
+
 class API:
     """
     Implement the Tweetworks API with HTTP POSTs.
@@ -73,56 +155,311 @@ class API:
         def __str__(self):
             return repr(self.parameter)
 
-    def __init__(self, api_key, username = "", password = ""):
+    # How many items Tweetworks returns on a full page of each listing
+    POSTS_PER_PAGE = 20
+    GROUPS_PER_PAGE = 30
+    USERS_PER_PAGE = 30
+
+    # HTTP statuses worth retrying a read-only request for
+    RETRY_CODES = (408, 429, 500, 502, 503, 504)
+
+    # The IDs of the items on a page of any listing, without decoding them
+    ITEM_IDS = lxml.etree.XPath("/*/*/id/text()")
+
+    def __init__(self, api_key, username = "", password = "", base_url = "http://www.tweetworks.com", pool_size = 4, idle_timeout = 30.0, max_workers = 1, prefetch = 0, identity_map_size = 0, lazy = False, cache = None, compress = True, timeout = None, retries = 0, backoff = 0.5, max_backoff = 30.0, rate_limiter = None):
         """
         We need a Tweetworks API key to send requests. Optionally specify a
         Tweetworks username and password to use those methods that require
         authentication.
+
+        base_url - The Tweetworks server to send requests to.
+
+        pool_size - How many idle keep-alive connections to keep per host;
+                    0 opens a new connection for every request.
+        idle_timeout - Seconds before an idle pooled connection is closed.
+
+        max_workers - How many pages of an explicit page list may be fetched
+                      at once; can be overridden per call.
+        prefetch - How many pages past the current one to keep in flight
+                   while crawling all pages of a listing (all = True or the
+                   iter_* methods); 0 fetches one page at a time.
+
+        identity_map_size - If nonzero, decoded users and groups are shared by
+                            ID, remembering up to this many of each.
+        lazy - If True, posts decode each field on first use instead of all
+               at once; see tweetworks.Post.
+
+        cache - An optional tweetworks.ResponseCache for read-only requests;
+                it may be shared between API objects, even with different
+                credentials.
+
+        compress - Whether to ask for gzip or deflate compressed responses;
+                   they are decompressed as they are parsed.
+
+        timeout - Seconds to wait for each response, or None to wait forever.
+        retries - How many times to retry a read-only request that failed
+                  with a network error or a transient HTTP status.
+        backoff - Seconds before the first retry; doubles with each retry,
+                  up to max_backoff, with a random jitter.
+        rate_limiter - An optional tweetworks.RateLimiter that every request
+                       waits on; it may be shared between API objects.
         """
 
         # Store the developer's API that will be used to make requests
         self.api_key = api_key
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+
+        # Optionally share User and Group objects between decoded responses
+        if identity_map_size > 0:
+            self.identity_map = tweetworks.IdentityMap(identity_map_size)
+        else:
+            self.identity_map = None
+
+        # Optionally decode post fields only when they're used
+        self.lazy = lazy
+
+        # Optionally cache read-only responses
+        self.cache = cache
 
-        # If a username and password were specified, set up authentication
+        # Optionally ask for compressed responses
+        self.compress = compress
+
+        # How to time out, retry and pace requests
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter
+
+        # All requests share a pool of keep-alive connections
+        self.pool = tweetworks.ConnectionPool(pool_size, idle_timeout)
+        handlers = [tweetworks.KeepAliveHandler(self.pool)]
+
+        # If a username and password were specified, set up authentication;
+        # cached responses are only shared between requests as the same user
+        self.username = ""
         if username != "" and password != "":
+            self.username = username
             password_mgr = urllib2.HTTPPasswordMgr()
-            password_mgr.add_password("Login please",
-                                      "http://www.tweetworks.com",
+            password_mgr.add_password("Login please", self.base_url,
                                       username, password)
-            auth_handler = urllib2.HTTPBasicAuthHandler(password_mgr)
-            self.auth = urllib2.build_opener(auth_handler)
-        else:
-            self.auth = None
+            handlers.append(urllib2.HTTPBasicAuthHandler(password_mgr))
+
+        # Build the URL opener used for every request
+        self.opener = urllib2.build_opener(*handlers)
+
+        # Running totals for all-pages crawls
+        self.crawl_stats = {"crawls" : 0, "pages" : 0, "requests_saved" : 0,
+                            "requests_wasted" : 0}
+        self.__stats_lock = threading.Lock()
+
+        # Instrumentation hooks, called after every request
+        self.hooks = []
+
+    def add_hook(self, hook):
+        """
+        Registers a hook to be called as hook(event) after every request,
+        where event is a dict describing it:
+
+        method - The API method the URL belongs to, e.g. "group_posts"
+        endpoint - The endpoint name, e.g. "posts/group"
+        url - The requested URL
+        page - The requested page number, or None
+        attempts - How many times the request was sent (0 if cached)
+        cached - Whether the response came from the response cache
+        latency - Seconds until the response headers arrived
+        wire_bytes - Bytes in the response body as sent, possibly compressed
+        bytes - Bytes in the response body once decompressed
+        parse_time - Seconds spent reading and parsing the response XML
+        decode_time - Seconds spent converting the XML into objects
+        objects - How many objects were produced (0 for pages past the end
+                  of a crawl, and for prefetched pages that were dropped)
+        error - The exception the request failed with, or None
+
+        A tweetworks.Metrics object is a ready-made hook that aggregates
+        these. Nothing is measured while no hooks are registered.
+        """
+
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Unregisters a hook added with add_hook.
+        """
+
+        self.hooks.remove(hook)
+
+    def __event(self, url):
+        """
+        Starts an instrumentation event for a request to the URL, or returns
+        None if there are no hooks to report it to.
+        """
+
+        # Don't measure anything unless someone is listening
+        if len(self.hooks) == 0:
+            return None
+
+        # API methods are named for their URL: /<type>/<action>/...
+        parts = urlparse.urlparse(url).path.strip("/").replace(".xml", "")
+        parts = parts.split("/")
+        page = re.search(r"[?&]page=(\d+)", url)
+        if page != None:
+            page = int(page.group(1))
+        return {"method" : "_".join(parts[1:2] + parts[0:1]),
+                "endpoint" : "/".join(parts[0:2]),
+                "url" : url,
+                "page" : page,
+                "attempts" : 0,
+                "cached" : False,
+                "latency" : 0.0,
+                "wire_bytes" : 0,
+                "bytes" : 0,
+                "parse_time" : 0.0,
+                "decode_time" : 0.0,
+                "objects" : 0,
+                "error" : None}
+
+    def __report(self, event, error = None):
+        """
+        Reports a finished instrumentation event to the hooks, with the error
+        the request failed with, if any.
+        """
+
+        event["error"] = error
+        for hook in self.hooks:
+            hook(event)
+
+    def __decode(self, event, page_reader, xml):
+        """
+        Converts response XML into a list of objects with the page reader,
+        timing it and reporting the finished event to the hooks, if any.
 
-    def __request(self, url, data = {}):
+        The objects are counted with the page reader's count function, if it
+        has one, and with len otherwise.
+        """
+
+        # Nothing to measure without an event
+        if event == None:
+            return page_reader(xml)
+
+        # Time the decoding, reporting a failure as well
+        start = time.time()
+        try:
+            items = page_reader(xml)
+        except Exception:
+            error = sys.exc_info()
+            event["decode_time"] = time.time() - start
+            self.__report(event, error[1])
+            raise error[0], error[1], error[2]
+        event["decode_time"] = time.time() - start
+        event["objects"] = getattr(page_reader, "count", len)(items)
+
+        # Report the request
+        self.__report(event)
+        return items
+
+    def __read(self, url, page_reader, data = {}, idempotent = True):
+        """
+        Requests the URL and converts the response XML into a list of objects
+        with the page reader.
+        """
+
+        event = self.__event(url)
+        return self.__decode(event, page_reader,
+                             self.__request(url, data, idempotent, event))
+
+    def __count(self, stat, amount = 1):
+        """
+        Adds the specified amount to one of the crawl stats.
+        """
+
+        self.__stats_lock.acquire()
+        try:
+            self.crawl_stats[stat] += amount
+        finally:
+            self.__stats_lock.release()
+
+    def __request(self, url, data = {}, idempotent = True, event = None):
         """
         POST the data (if any) to the specified URL, and return the parsed
         XML. An exception is thrown if there was an error.
-        """
 
-        # Add the API key and encode the data
-        data["data[key]"] = self.api_key
-        encoded_data = urllib.urlencode(data)
+        Unless idempotent is False (the request changes something), transient
+        failures are retried, and the response may come from, and will be
+        stored in, the API's response cache if it has one.
 
-        # Construct the request
-        request = urllib2.Request(url, encoded_data)
+        If an instrumentation event is specified, the request's measurements
+        are recorded in it, and it is reported to the hooks if the request
+        fails.
+        """
+
+        # Nothing to report without an event
+        if event == None:
+            return self.__fetch(url, data, idempotent, event)
 
-        # Check for HTTP request errors
+        # Report failures, then pass them on with their tracebacks
         try:
-            # Use an authenticating URL opener if necessary
-            if self.auth != None:
-                response = self.auth.open(request)
-            else:
-                response = urllib2.urlopen(request)
-        except urllib2.HTTPError, e:
-            # Authentication error
-            if e.code == 401:
-                raise API.TweetworksException("Authentication required", url)
-            else:
-                raise API.TweetworksException(str(e), url)
+            return self.__fetch(url, data, idempotent, event)
+        except Exception:
+            error = sys.exc_info()
+            self.__report(event, error[1])
+            raise error[0], error[1], error[2]
+
+    def __fetch(self, url, data, idempotent, event):
+        """
+        Sends the request for __request, retrying and caching as described
+        there, without reporting failures.
+        """
 
-        # Parse the XML response
-        xml_response = lxml.etree.parse(response)
+        # Use a cached response if there is one
+        use_cache = idempotent and self.cache != None
+        if use_cache:
+            xml_response = self.cache.get(url, data, self.username)
+            if xml_response != None:
+                if event != None:
+                    event["cached"] = True
+                return xml_response
+
+        # Add the API key (without touching the caller's data) and encode it
+        keyed_data = dict(data)
+        keyed_data["data[key]"] = self.api_key
+        encoded_data = urllib.urlencode(keyed_data)
+
+        # Keep trying until we get a response or run out of retries
+        attempt = 0
+        while True:
+            # Wait our turn under the rate limit
+            if self.rate_limiter != None:
+                self.rate_limiter.acquire()
+
+            # Check for HTTP request errors
+            try:
+                response_bytes, xml_response = self.__send(url, encoded_data,
+                                                           event)
+                break
+            except urllib2.HTTPError, e:
+                # Hang up on the error response; we don't read its body
+                e.close()
+
+                # Transient server trouble can be retried
+                retry = e.code in API.RETRY_CODES
+                if not (retry and idempotent and attempt < self.retries):
+                    # Authentication error
+                    if e.code == 401:
+                        raise API.TweetworksException("Authentication required", url)
+                    else:
+                        raise API.TweetworksException(str(e), url)
+            except (urllib2.URLError, httplib.HTTPException, socket.error):
+                # So can network trouble
+                if not (idempotent and attempt < self.retries):
+                    raise
+
+            # Back off exponentially, with jitter, before trying again
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+            time.sleep(random.uniform(0, delay))
+            attempt += 1
         #print url
         #print lxml.etree.tostring(xml_response, pretty_print=True)
         
@@ -131,43 +468,195 @@ class API:
         if len(error) > 0:
             raise API.TweetworksException(error[0], url)
 
+        # Cache the response for next time
+        if use_cache:
+            self.cache.put(url, data, xml_response, response_bytes,
+                           self.username)
+
         # Return the response XML
         return xml_response
 
-    def __request_all_pages(self, url, page_reader, data = {}):
+    def __send(self, url, encoded_data, event = None):
+        """
+        POSTs the encoded data to the URL once, and returns the number of
+        (decompressed) bytes in the response and the parsed response XML.
+        Timings are recorded in the instrumentation event, if any.
+        """
+
+        # Construct the request
+        request = urllib2.Request(url, encoded_data)
+        if self.compress:
+            request.add_header("Accept-Encoding", "gzip, deflate")
+        if event != None:
+            event["attempts"] += 1
+            start = time.time()
+
+        # The opener authenticates if necessary and reuses connections
+        if self.timeout != None:
+            response = self.opener.open(request, timeout = self.timeout)
+        else:
+            response = self.opener.open(request)
+        if event != None:
+            event["latency"] = time.time() - start
+            start = time.time()
+
+        # Decompress the response as it is parsed, if it was compressed
+        encoding = response.info().getheader("Content-Encoding", "").lower()
+        wire = _CountingReader(response)
+        if encoding in ("gzip", "x-gzip", "deflate"):
+            response = _DecompressingReader(wire, encoding.replace("x-", ""))
+        else:
+            response = wire
+
+        # Parse the XML response; reading it to the end releases the connection
+        try:
+            xml_response = lxml.etree.parse(response)
+        finally:
+            response.close()
+        if event != None:
+            event["parse_time"] = time.time() - start
+            event["wire_bytes"] = wire.bytes
+            event["bytes"] = response.bytes
+
+        # Return the response size and XML
+        return (response.bytes, xml_response)
+
+    def __request_all_pages(self, url, page_reader, page_size, data = {}):
         """
         Repeatedly requests the specified URL with the specified POST data,
         incrementing the page by 1 until no new pages are available. Each page
         is read by the specified reader to convert XML into a list of objects,
         which are appended. The final output list is returned.
 
-        url must be specified ending in ? or & as appropriate for the query.
+        page_size is the number of items on a full page of this listing.
+        """
+
+        # Collect every item from every page
+        return list(self.__iter_all_pages(url, page_reader, page_size, data))
+
+    def __iter_all_pages(self, url, page_reader, page_size, data = {}):
         """
+        Like __request_all_pages, but yields the objects read from each page
+        as soon as it arrives. Unless the API prefetches, the next page is not
+        requested until all of the current page's objects have been consumed,
+        so stopping early avoids fetching any further pages.
+
+        A page with fewer than page_size items is the last one. Past the end,
+        Tweetworks repeats the last page, so a full page is only known to be
+        the last when the next one has the same item IDs.
+
+        If the API prefetches, that many pages past the current one are kept
+        in flight on background threads. Prefetched pages past the end are
+        dropped, and counted in crawl_stats as requests_wasted.
+        """
+
+        # Fetch one page, unless the crawl has already ended
+        stopped = threading.Event()
+        def fetch(page):
+            if stopped.is_set():
+                return None
+            paged_url = self.__page_url(url, page)
+            event = self.__event(paged_url)
+            return (event, self.__request(paged_url, data, True, event))
+
+        # Count and report dropped prefetches that were actually requested
+        def count_wasted(future):
+            if future.exception() == None and future.result() != None:
+                self.__count("requests_wasted")
+                event = future.result()[0]
+                if event != None:
+                    self.__report(event)
+
+        # Optionally keep pages in flight ahead of the current one
+        prefetch = self.prefetch
+        if prefetch > 0:
+            workers = tweetworks.WorkerPool(prefetch + 1)
+        else:
+            workers = None
+        in_flight = {}
 
         # Loop over the requested pages
-        items = []
+        self.__count("crawls")
         page = 1
-        last_items_xml_string = ""
-        while True:
-            # Add the current page number to the URL
-            paged_url = "%spage=%d" % (url, page)
-            
-            # Read the items from the response XML
-            items_xml = self.__request(paged_url, data)
-            items_xml_string = lxml.etree.tostring(items_xml)
-
-            # Check if this is the last page
-            if (last_items_xml_string == items_xml_string):
-                break
+        last_fingerprint = None
+        try:
+            while True:
+                # Fetch the current page, first queueing any read-ahead
+                if workers == None:
+                    event, items_xml = fetch(page)
+                else:
+                    for ahead in xrange(page, page + prefetch + 1):
+                        if ahead not in in_flight:
+                            in_flight[ahead] = workers.submit(fetch, ahead)
+                    event, items_xml = in_flight.pop(page).result()
+
+                # Fingerprint the page by its item IDs before decoding anything
+                ids = API.ITEM_IDS(items_xml)
+                fingerprint = hash(tuple(ids))
+
+                # Check if we've run past the last page; that request is
+                # reported too, without decoding anything
+                if len(ids) == 0 or fingerprint == last_fingerprint:
+                    if event != None:
+                        self.__report(event)
+                    break
+                self.__count("pages")
+
+                # Hand over these new items
+                for item in self.__decode(event, page_reader, items_xml):
+                    yield item
+                last_fingerprint = fingerprint
+
+                # A short page is the last one; don't request it again to be
+                # sure
+                if len(ids) < page_size:
+                    if workers == None:
+                        self.__count("requests_saved")
+                    break
+
+                # Increment the page
+                page = page + 1
+        finally:
+            # Drop any read-ahead, even if the consumer stopped early
+            if workers != None:
+                stopped.set()
+                for future in in_flight.itervalues():
+                    future.add_done_callback(count_wasted)
+                workers.shutdown(wait = False)
+
+    def __page_url(self, url, page):
+        """
+        Adds the specified page number to the URL's query string.
+        """
+
+        # Start or extend the query string as appropriate
+        if "?" in url:
+            return "%s&page=%d" % (url, page)
+        else:
+            return "%s?page=%d" % (url, page)
 
-            # Append these new items to the list
-            items = items + page_reader(items_xml)
-            last_items_xml_string = items_xml_string
+    def __request_pages(self, url, pages, page_reader, data = {}, max_workers = None):
+        """
+        Requests each of the specified pages of the URL with the specified POST
+        data, reading each with the specified reader to convert XML into a list
+        of objects. The pages are fetched on up to max_workers threads (the
+        API default if None), and the items are returned in page order. If a
+        page fails, no further pages are requested and its error is raised.
+        """
 
-            # Increment the page
-            page = page + 1
+        # Use the API-wide concurrency unless overridden
+        if max_workers == None:
+            max_workers = self.max_workers
 
-        # Return the full list of requested items
+        # Fetch and read the pages
+        def read_page(page):
+            return self.__read(self.__page_url(url, page), page_reader, data)
+        pages = tweetworks.WorkerPool(max_workers).map(read_page, pages)
+
+        # Concatenate the pages in order
+        items = []
+        for page_items in pages:
+            items.extend(page_items)
         return items
 
     def __read_post_xml(self, posts_xml):
@@ -178,13 +667,108 @@ class API:
         # Loop over the <post> elements
         posts = []
         for post_xml in posts_xml.xpath("/posts/post"):
-            post_string = lxml.etree.tostring(post_xml)
-            posts.append(Post.Post(lxml.etree.fromstring(post_string)))
+            posts.append(tweetworks.Post(post_xml, self.identity_map,
+                                         self.lazy))
 
         # Return the read posts
         return posts
 
-    def __paginate_posts(self, url_prefix, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None):
+    def __posts_url(self, url_prefix, sort_by_updated = False, before_id = None, after_id = None):
+        """
+        Formats the URL of a post listing with the specified sort order and
+        optional post offsets.
+        """
+
+        # Format the request URL
+        url = "%s/%s.xml" % (url_prefix, ("newest", "updated")[sort_by_updated])
+
+        # Was a post offset specified?
+        if before_id != None:
+            # Format the post offset
+            url += "?beforeId=%d" % before_id
+            if after_id != None:
+                url += "&afterId=%d" % after_id
+        else:
+            # Format the post offset
+            if after_id != None:
+                url += "?afterId=%d" % after_id
+
+        # Return the formatted URL
+        return url
+
+    def __iter_posts(self, url_prefix, sort_by_updated = False, before_id = None, after_id = None, cursor = False):
+        """
+        Iterates over every post at the specified URL, a page at a time. See
+        __paginate_posts for the options.
+        """
+
+        # Walk the posts by ID instead of by page number if asked to
+        if cursor:
+            return self.__iter_posts_by_cursor(url_prefix, sort_by_updated,
+                                               before_id, after_id)
+
+        # Format the request URL
+        url = self.__posts_url(url_prefix, sort_by_updated, before_id, after_id)
+
+        # Read the posts a page at a time
+        return self.__iter_all_pages(url, self.__read_post_xml,
+                                     API.POSTS_PER_PAGE)
+
+    def __iter_posts_by_cursor(self, url_prefix, sort_by_updated = False, before_id = None, after_id = None):
+        """
+        Iterates over every post at the specified URL, newest first, always
+        requesting the first page of posts before the oldest post seen so far
+        rather than numbered pages. New posts arriving during the crawl can't
+        shift later pages, so no post is repeated or skipped, and the server
+        never has to skip over deep page offsets.
+
+        A guard set of the IDs on the previous page also drops any post that
+        reappears across a page boundary.
+        """
+
+        # Posts sorted by last update aren't in ID order
+        if sort_by_updated:
+            raise API.TweetworksException("Cursor crawls require posts sorted "
+                                          "by creation")
+
+        # Walk backwards from the newest (or before_id) post
+        self.__count("crawls")
+        seen = set()
+        while True:
+            # Request the posts before the cursor
+            url = self.__posts_url(url_prefix, False, before_id, after_id)
+            event = self.__event(url)
+            posts_xml = self.__request(url, {}, True, event)
+            ids = [int(id) for id in API.ITEM_IDS(posts_xml)]
+
+            # Keep only posts we haven't already seen
+            if before_id != None:
+                fresh = [id for id in ids if id < before_id and id not in seen]
+            else:
+                fresh = [id for id in ids if id not in seen]
+            if len(fresh) == 0:
+                if event != None:
+                    self.__report(event)
+                break
+            self.__count("pages")
+
+            # Hand over the new posts, once each
+            pending = set(fresh)
+            for post in self.__decode(event, self.__read_post_xml, posts_xml):
+                if post.id in pending:
+                    pending.discard(post.id)
+                    yield post
+
+            # A short page is the last one
+            if len(ids) < API.POSTS_PER_PAGE:
+                self.__count("requests_saved")
+                break
+
+            # Continue from the oldest post on this page
+            before_id = min(fresh)
+            seen = set(fresh)
+
+    def __paginate_posts(self, url_prefix, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None, max_workers = None, cursor = False, page_reader = None):
         """
         Retrieves posts at the specified URL, paginating if necessary according
         to the options.
@@ -194,27 +778,29 @@ class API:
 
         pages - An optional list of specific pages to retrieve.
         all - Whether all posts at this URL should be retrieved.
+        max_workers - How many of the listed pages to fetch at once.
 
         before_id - Retrieve posts created/updated before the specified post
         after_id - Retrieve posts created/updated after the specified post
 
+        cursor - With all, walk the posts by feeding the oldest post ID on
+                 each page back in as before_id, instead of requesting
+                 numbered pages; this gives a duplicate-free snapshot even
+                 while new posts arrive. Requires creation order.
+
+        page_reader - Converts each page's XML into a list of items; by
+                      default, Post objects. Not used for cursor crawls.
+
         If no paging options are specified, 20 posts matching the criteria are
         retrieved.
         """
 
-        # Format the request URL
-        url = "%s/%s.xml" % (url_prefix, ("newest", "updated")[sort_by_updated])
+        # Decode Post objects unless told otherwise
+        if page_reader == None:
+            page_reader = self.__read_post_xml
 
-        # Was a post offset specified?
-        if before_id != None:
-            # Format the post offset
-            url += "?beforeId=%d" % before_id
-            if after_id != None:
-                url += "&afterId=%d" % after_id
-        else:
-            # Format the post offset
-            if after_id != None:
-                url += "?afterId=%d" % after_id
+        # Format the request URL
+        url = self.__posts_url(url_prefix, sort_by_updated, before_id, after_id)
 
         # Are we retrieving a single page?
         if pages != None:
@@ -222,28 +808,23 @@ class API:
             if all:
                 raise API.TweetworksException("Conflicting pages requested")
 
-            # Loop over the requested pages
-            posts = []
-            for page in pages:
-                # Format the request URL
-                if before_id != None or after_id != None:
-                    page_url = "%s&page=%d" % (url, page)
-                else:
-                    page_url = "%s?page=%d" % (url, page)
-
-                # Read the posts from the response XML
-                posts = posts + self.__read_post_xml(self.__request(page_url))
-
-            # Return the requested posts
-            return posts
+            # Read the posts from each requested page's response XML
+            return self.__request_pages(url, pages, page_reader,
+                                        max_workers = max_workers)
         else:
             # Are we retrieving all pages?
-            if all:
+            if all and cursor:
+                # Walk the posts by ID as a single list
+                return list(self.__iter_posts_by_cursor(url_prefix,
+                                                        sort_by_updated,
+                                                        before_id, after_id))
+            elif all:
                 # Request the paginated posts as a single list
-                return self.__request_all_pages(url + "&", self.__read_post_xml)
+                return self.__request_all_pages(url, page_reader,
+                                                API.POSTS_PER_PAGE)
             else:
                 # Read the posts from the response XML
-                return self.__read_post_xml(self.__request(url))
+                return self.__read(url, page_reader)
 
     def __read_group_xml(self, groups_xml):
         """
@@ -253,13 +834,15 @@ class API:
         # Loop over the <group> elements
         groups = []
         for group_xml in groups_xml.xpath("/groups/group"):
-            group_string = lxml.etree.tostring(group_xml)
-            groups.append(tweetworks.Group(lxml.etree.fromstring(group_string)))
+            if self.identity_map != None:
+                groups.append(self.identity_map.group(group_xml))
+            else:
+                groups.append(tweetworks.Group(group_xml))
 
         # Return the read groups
         return groups
 
-    def __paginate_groups(self, url, data = {}, pages = None, all = False):
+    def __paginate_groups(self, url, data = {}, pages = None, all = False, max_workers = None):
         """
         Retrieves groups at the specified URL, paginating if necessary according
         to the options.
@@ -268,6 +851,7 @@ class API:
 
         pages - An optional list of specific pages to retrieve.
         all - Whether all posts at this URL should be retrieved.
+        max_workers - How many of the listed pages to fetch at once.
 
         If no paging options are specified, 30 groups matching the criteria are
         retrieved.
@@ -279,25 +863,18 @@ class API:
             if all:
                 raise API.TweetworksException("Conflicting pages requested")
 
-            # Loop over the requested pages
-            groups = []
-            for page in pages:
-                # Format the request URL
-                page_url = "%s?page=%d" % (url, page)
-
-                # Read the groups from the response XML
-                groups = groups + self.__read_group_xml(self.__request(page_url, data))
-
-            # Return the requested groups
-            return groups
+            # Read the groups from each requested page's response XML
+            return self.__request_pages(url, pages, self.__read_group_xml, data,
+                                        max_workers)
         else:
             # Are we retrieving all pages?
             if all:
                 # Request the paginated groups as a single list
-                return self.__request_all_pages(url + "?", self.__read_group_xml, data)
+                return self.__request_all_pages(url, self.__read_group_xml,
+                                                API.GROUPS_PER_PAGE, data)
             else:
                 # Read the groups from the response XML
-                return self.__read_group_xml(self.__request(url, data))
+                return self.__read(url, self.__read_group_xml, data)
 
     def __read_user_xml(self, users_xml):
         """
@@ -307,13 +884,15 @@ class API:
         # Loop over the <user> elements
         users = []
         for user_xml in users_xml.xpath("/users/user"):
-            user_string = lxml.etree.tostring(user_xml)
-            users.append(User.User(lxml.etree.fromstring(user_string)))
+            if self.identity_map != None:
+                users.append(self.identity_map.user(user_xml))
+            else:
+                users.append(tweetworks.User(user_xml))
 
         # Return the read users
         return users
 
-    def __paginate_users(self, url, data = {}, pages = None, all = False):
+    def __paginate_users(self, url, data = {}, pages = None, all = False, max_workers = None):
         """
         Retrieves users at the specified URL, paginating if necessary according
         to the options.
@@ -322,6 +901,7 @@ class API:
 
         pages - An optional list of specific pages to retrieve.
         all - Whether all posts at this URL should be retrieved.
+        max_workers - How many of the listed pages to fetch at once.
 
         If no paging options are specified, 30 users matching the criteria are
         retrieved.
@@ -333,25 +913,18 @@ class API:
             if all:
                 raise API.TweetworksException("Conflicting pages requested")
 
-            # Loop over the requested pages
-            users = []
-            for page in pages:
-                # Format the request URL
-                page_url = "%s?page=%d" % (url, page)
-
-                # Read the users from the response XML
-                users = users + self.__read_user_xml(self.__request(page_url, data))
-
-            # Return the requested users
-            return users
+            # Read the users from each requested page's response XML
+            return self.__request_pages(url, pages, self.__read_user_xml, data,
+                                        max_workers)
         else:
             # Are we retrieving all pages?
             if all:
                 # Request the paginated users as a single list
-                return self.__request_all_pages(url + "?", self.__read_user_xml, data)
+                return self.__request_all_pages(url, self.__read_user_xml,
+                                                API.USERS_PER_PAGE, data)
             else:
                 # Read the users from the response XML
-                return self.__read_user_xml(self.__request(url, data))
+                return self.__read(url, self.__read_user_xml, data)
 
     def add_posts(self, body, group_id = None, parent_id = None, tweet = False):
         """
@@ -365,7 +938,7 @@ class API:
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/posts/add.xml"
+        url = "%s/posts/add.xml" % self.base_url
 
         # Format the post data
         data = {"data[Post][body]" : body,
@@ -374,9 +947,57 @@ class API:
                 "data[Post][sendToTwitter]" : (0, 1)[tweet]}
 
         # Read the post from the response XML
-        return Post.Post(self.__request(url, data))
+        def read_post(post_xml):
+            return [tweetworks.Post(post_xml, self.identity_map, self.lazy)]
+        post = self.__read(url, read_post, data, idempotent = False)[0]
 
-    def contributed_posts(self, username, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None):
+        # A new post changes every cached post listing
+        if self.cache != None:
+            self.cache.invalidate(["posts/"])
+
+        # Return the new post
+        return post
+
+    def bulk_add_posts(self, items, max_workers = None, rate = None):
+        """
+        Submits many posts at once. Each item is a tuple of add_posts
+        arguments: (body, group_id, parent_id, tweet), where all but the body
+        may be left off. Up to max_workers posts (the API default if None)
+        are in flight at a time, and if a rate is specified, no more than that
+        many are started per second.
+
+        Returns a list with, for each item in order, either the new Post or
+        the exception that prevented it from being posted: a
+        TweetworksException, or a network or parse error (which leaves it
+        unknown whether the post was created).
+
+        Requires authentication; posts will originate from that user.
+        """
+
+        # Use the API-wide concurrency unless overridden
+        if max_workers == None:
+            max_workers = self.max_workers
+
+        # Pace the posts if asked to
+        if rate != None:
+            limiter = tweetworks.RateLimiter(rate)
+        else:
+            limiter = None
+
+        # Post one item, handing back any failure instead of raising it, so
+        # that one bad response doesn't lose the results of the others
+        def add(item):
+            if limiter != None:
+                limiter.acquire()
+            try:
+                return self.add_posts(*item)
+            except Exception, e:
+                return e
+
+        # Submit every item
+        return tweetworks.WorkerPool(max_workers).map(add, items)
+
+    def contributed_posts(self, username, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None, max_workers = None, cursor = False):
         """
         Retrieves posts contributed by the specified user, selected by the
         specified optional criteria.
@@ -385,12 +1006,26 @@ class API:
         """
 
         # Format the request URL prefix
-        url_prefix = "http://www.tweetworks.com/posts/contributed/%s" % username
+        url_prefix = "%s/posts/contributed/%s" % (self.base_url, username)
 
         # Return the read (and paginated) posts
-        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id)
+        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id, max_workers, cursor)
+
+    def iter_contributed_posts(self, username, sort_by_updated = False, before_id = None, after_id = None, cursor = False):
+        """
+        Iterates over all posts contributed by the specified user, reading a
+        page at a time as the posts are consumed.
+
+        Requires authentication from the specified user.
+        """
 
-    def group_posts(self, group, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None):
+        # Format the request URL prefix
+        url_prefix = "%s/posts/contributed/%s" % (self.base_url, username)
+
+        # Return the lazily paginated posts
+        return self.__iter_posts(url_prefix, sort_by_updated, before_id, after_id, cursor)
+
+    def group_posts(self, group, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None, max_workers = None, cursor = False):
         """
         Retrieves posts contained in the specified group, selected by the
         specified optional criteria.
@@ -399,23 +1034,49 @@ class API:
         """
 
         # Format the request URL prefix
-        url_prefix = "http://www.tweetworks.com/posts/group/%s" % group
+        url_prefix = "%s/posts/group/%s" % (self.base_url, group)
 
         # Return the read (and paginated) posts
-        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id)
+        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id, max_workers, cursor)
+
+    def iter_group_posts(self, group, sort_by_updated = False, before_id = None, after_id = None, cursor = False):
+        """
+        Iterates over all posts contained in the specified group, reading a
+        page at a time as the posts are consumed.
+
+        A private group requires authentication from a user in that group.
+        """
 
-    def index_posts(self, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None):
+        # Format the request URL prefix
+        url_prefix = "%s/posts/group/%s" % (self.base_url, group)
+
+        # Return the lazily paginated posts
+        return self.__iter_posts(url_prefix, sort_by_updated, before_id, after_id, cursor)
+
+    def index_posts(self, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None, max_workers = None, cursor = False):
         """
         Retrieves all posts, selected by the specified optional criteria.
         """
 
         # Format the request URL prefix
-        url_prefix = "http://www.tweetworks.com/posts/index"
+        url_prefix = "%s/posts/index" % self.base_url
 
         # Return the read (and paginated) posts
-        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id)
+        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id, max_workers, cursor)
 
-    def joined_groups_posts(self, username, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None):
+    def iter_index_posts(self, sort_by_updated = False, before_id = None, after_id = None, cursor = False):
+        """
+        Iterates over all posts, reading a page at a time as the posts are
+        consumed.
+        """
+
+        # Format the request URL prefix
+        url_prefix = "%s/posts/index" % self.base_url
+
+        # Return the lazily paginated posts
+        return self.__iter_posts(url_prefix, sort_by_updated, before_id, after_id, cursor)
+
+    def joined_groups_posts(self, username, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None, max_workers = None, cursor = False):
         """
         Retrieves posts contained in all of the groups joined by the specified
         user, selected by the specified optional criteria.
@@ -424,10 +1085,57 @@ class API:
         """
 
         # Format the request URL prefix
-        url_prefix = "http://www.tweetworks.com/posts/joined_groups/%s" % username
+        url_prefix = "%s/posts/joined_groups/%s" % (self.base_url, username)
 
         # Return the read (and paginated) posts
-        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id)
+        return self.__paginate_posts(url_prefix, sort_by_updated, pages, all, before_id, after_id, max_workers, cursor)
+
+    def iter_joined_groups_posts(self, username, sort_by_updated = False, before_id = None, after_id = None, cursor = False):
+        """
+        Iterates over all posts contained in all of the groups joined by the
+        specified user, reading a page at a time as the posts are consumed.
+
+        Requires authentication from the specified user.
+        """
+
+        # Format the request URL prefix
+        url_prefix = "%s/posts/joined_groups/%s" % (self.base_url, username)
+
+        # Return the lazily paginated posts
+        return self.__iter_posts(url_prefix, sort_by_updated, before_id, after_id, cursor)
+
+    def post_batch(self, listing, name = None, sort_by_updated = False, pages = None, all = False, before_id = None, after_id = None, max_workers = None):
+        """
+        Retrieves posts like the post listing methods, with the same options,
+        but decodes them straight into a single tweetworks.PostBatch instead
+        of Post objects.
+
+        listing - "contributed", "group", "index" or "joined_groups", for the
+                  posts of contributed_posts, group_posts, index_posts or
+                  joined_groups_posts
+        name - The username or group the listing is for, if any
+        """
+
+        # Format the request URL prefix
+        url_prefix = "%s/posts/%s" % (self.base_url, listing)
+        if name != None:
+            url_prefix += "/%s" % name
+
+        # Decode each page into a batch of its own, counting its posts
+        def read_batch(posts_xml):
+            batch = tweetworks.PostBatch()
+            batch.read_xml(posts_xml)
+            return [batch]
+        read_batch.count = lambda batches: len(batches[0])
+
+        # Join the pages' batches in order
+        batch = tweetworks.PostBatch()
+        for page_batch in self.__paginate_posts(url_prefix, sort_by_updated,
+                                                pages, all, before_id,
+                                                after_id, max_workers,
+                                                page_reader = read_batch):
+            batch.extend(page_batch)
+        return batch
 
     def view_posts(self, id):
         """
@@ -435,10 +1143,10 @@ class API:
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/posts/view/%d.xml" % id
+        url = "%s/posts/view/%d.xml" % (self.base_url, id)
 
         # Read the posts from the response XML
-        posts = self.__read_post_xml(self.__request(url))
+        posts = self.__read(url, self.__read_post_xml)
         if len(posts) == 1:
             # Return the single post
             return posts[0]
@@ -447,17 +1155,30 @@ class API:
             raise API.TweetworksException("%d posts were returned" % len(posts),
                                           url)
 
-    def index_groups(self, pages = None, all = False):
+    def index_groups(self, pages = None, all = False, max_workers = None):
         """
         Retrieves all Tweetworks groups, selected by the specified optional
         criteria.
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/groups/index.xml"
+        url = "%s/groups/index.xml" % self.base_url
 
         # Return the read (and paginated) groups
-        return self.__paginate_groups(url, {}, pages, all)
+        return self.__paginate_groups(url, {}, pages, all, max_workers)
+
+    def iter_index_groups(self):
+        """
+        Iterates over all Tweetworks groups, reading a page at a time as the
+        groups are consumed.
+        """
+
+        # Format the request URL
+        url = "%s/groups/index.xml" % self.base_url
+
+        # Return the lazily paginated groups
+        return self.__iter_all_pages(url, self.__read_group_xml,
+                                     API.GROUPS_PER_PAGE)
 
     def join_groups(self, group):
         """
@@ -467,19 +1188,24 @@ class API:
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/groups/join/%s.xml" % group
+        url = "%s/groups/join/%s.xml" % (self.base_url, group)
 
         # Read the groups from the response XML
-        groups = self.__read_group_xml(self.__request(url))
+        groups = self.__read(url, self.__read_group_xml, idempotent = False)
         if len(groups) == 1:
+            # Membership changes invalidate cached member and group listings
+            if self.cache != None:
+                self.cache.invalidate(["groups/joined", "users/group",
+                                       "posts/joined_groups"])
+
             # Return the joined group
             return groups[0]
         else:
             # Something weird happened to result in non-unary group result
-            raise API.TweetworksException("%d groups were joined" % len(posts),
+            raise API.TweetworksException("%d groups were joined" % len(groups),
                                           url)
 
-    def joined_groups(self, username, pages = None, all = False):
+    def joined_groups(self, username, pages = None, all = False, max_workers = None):
         """
         Retrieves all groups of which the specified user is a member, selected
         by the specified optional criteria.
@@ -488,10 +1214,25 @@ class API:
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/groups/joined/%s.xml" % username
+        url = "%s/groups/joined/%s.xml" % (self.base_url, username)
 
         # Return the read (and paginated) groups
-        return self.__paginate_groups(url, {}, pages, all)
+        return self.__paginate_groups(url, {}, pages, all, max_workers)
+
+    def iter_joined_groups(self, username):
+        """
+        Iterates over all groups of which the specified user is a member,
+        reading a page at a time as the groups are consumed.
+
+        Requires authentication from the specified user.
+        """
+
+        # Format the request URL
+        url = "%s/groups/joined/%s.xml" % (self.base_url, username)
+
+        # Return the lazily paginated groups
+        return self.__iter_all_pages(url, self.__read_group_xml,
+                                     API.GROUPS_PER_PAGE)
 
     def search_groups(self, query):
         """
@@ -500,7 +1241,7 @@ class API:
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/groups/search.xml"
+        url = "%s/groups/search.xml" % self.base_url
 
         # Format the post data
         data = {"data[query]" : query}
@@ -508,29 +1249,71 @@ class API:
         # Return the read (and paginated) groups
         return self.__paginate_groups(url, data, all = True)
 
-    def group_users(self, group, pages = None, all = False):
+    def iter_search_groups(self, query):
+        """
+        Iterates over the groups matching the specified query string, reading
+        a page at a time as the groups are consumed.
+        """
+
+        # Format the request URL
+        url = "%s/groups/search.xml" % self.base_url
+
+        # Format the post data
+        data = {"data[query]" : query}
+
+        # Return the lazily paginated groups
+        return self.__iter_all_pages(url, self.__read_group_xml,
+                                     API.GROUPS_PER_PAGE, data)
+
+    def group_users(self, group, pages = None, all = False, max_workers = None):
         """
         Retrieves all users who are members of the specified group, selected
         by the specified optional criteria.
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/users/group/%s.xml" % group
+        url = "%s/users/group/%s.xml" % (self.base_url, group)
 
         # Return the read (and paginated) users
-        return self.__paginate_users(url, {}, pages, all)
+        return self.__paginate_users(url, {}, pages, all, max_workers)
+
+    def iter_group_users(self, group):
+        """
+        Iterates over all users who are members of the specified group,
+        reading a page at a time as the users are consumed.
+        """
+
+        # Format the request URL
+        url = "%s/users/group/%s.xml" % (self.base_url, group)
+
+        # Return the lazily paginated users
+        return self.__iter_all_pages(url, self.__read_user_xml,
+                                     API.USERS_PER_PAGE)
 
-    def index_users(self, pages = None, all = False):
+    def index_users(self, pages = None, all = False, max_workers = None):
         """
         Retrieves all Tweetworks users, selected by the specified optional
         criteria.
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/users/index.xml"
+        url = "%s/users/index.xml" % self.base_url
 
         # Return the read (and paginated) users
-        return self.__paginate_users(url, {}, pages, all)
+        return self.__paginate_users(url, {}, pages, all, max_workers)
+
+    def iter_index_users(self):
+        """
+        Iterates over all Tweetworks users, reading a page at a time as the
+        users are consumed.
+        """
+
+        # Format the request URL
+        url = "%s/users/index.xml" % self.base_url
+
+        # Return the lazily paginated users
+        return self.__iter_all_pages(url, self.__read_user_xml,
+                                     API.USERS_PER_PAGE)
 
     def search_users(self, query):
         """
@@ -539,10 +1322,26 @@ class API:
         """
 
         # Format the request URL
-        url = "http://www.tweetworks.com/users/search.xml"
+        url = "%s/users/search.xml" % self.base_url
 
         # Format the post data
         data = {"data[query]" : query}
 
         # Return the read (and paginated) users
         return self.__paginate_users(url, data, all = True)
+
+    def iter_search_users(self, query):
+        """
+        Iterates over the users matching the specified query string, reading
+        a page at a time as the users are consumed.
+        """
+
+        # Format the request URL
+        url = "%s/users/search.xml" % self.base_url
+
+        # Format the post data
+        data = {"data[query]" : query}
+
+        # Return the lazily paginated users
+        return self.__iter_all_pages(url, self.__read_user_xml,
+                                     API.USERS_PER_PAGE, data)
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Stream Tweetworks posts, users and groups to and from archive files.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import itertools
+import json
+import lxml.etree
+from lxml.builder import E
+
+# Tweetworks includes
+import tweetworks
+
+class Archive:
+    """
+    Writes any number of Post, User and Group objects to a file one at a time,
+    and reads them back the same way, so archives never need to fit in memory.
+
+    Two formats are supported:
+
+    xml - The same elements the Tweetworks API returns (and the constructors
+          read), inside a <posts>, <users> or <groups> root named for the
+          first object
+    ndjson - One compact JSON object per line, each with a "type" of "post",
+             "user" or "group"; much faster to read back than XML
+    """
+
+    # Archive formats by file extension
+    FORMATS = {".xml" : "xml", ".ndjson" : "ndjson", ".jsonl" : "ndjson"}
+
+    def __init__(self, path, format = None):
+        """
+        path - string - The archive file
+        format - string - "xml" or "ndjson"; by default, chosen by the file
+                          extension, falling back to XML
+        """
+
+        # Pick the format from the extension unless told otherwise
+        if format == None:
+            for extension, extension_format in Archive.FORMATS.iteritems():
+                if path.endswith(extension):
+                    format = extension_format
+            if format == None:
+                format = "xml"
+        if format not in ("xml", "ndjson"):
+            raise ValueError("Unknown archive format %s" % format)
+        self.path = path
+        self.format = format
+
+    def write(self, objects):
+        """
+        Writes the Post, User and Group objects, replacing the archive, and
+        returns how many top-level objects were written. Replies are written
+        nested in their parent posts, not as objects of their own.
+        """
+
+        output = open(self.path, "wb")
+        try:
+            if self.format == "xml":
+                return self.__write_xml(output, objects)
+            else:
+                return self.__write_ndjson(output, objects)
+        finally:
+            output.close()
+
+    def read(self, identity_map = None):
+        """
+        Iterates over the objects in the archive, in the order written.
+
+        Users and groups embedded in NDJSON posts are shared between posts
+        when their ID and fields are the same. For XML archives, specify an
+        identity_map (tweetworks.IdentityMap) to share them by ID.
+        """
+
+        if self.format == "xml":
+            return self.__read_xml(identity_map)
+        else:
+            return self.__read_ndjson()
+
+    def __write_xml(self, output, objects):
+        # Name the root for the first object; an empty archive holds posts
+        objects = iter(objects)
+        try:
+            first = objects.next()
+        except StopIteration:
+            first = None
+            root = "posts"
+        else:
+            root = {tweetworks.Post : "posts", tweetworks.User : "users",
+                    tweetworks.Group : "groups"}[type(first)]
+            objects = itertools.chain([first], objects)
+
+        # Write one element at a time, as it is built
+        count = 0
+        with lxml.etree.xmlfile(output, encoding = "utf-8") as xf:
+            xf.write_declaration()
+            with xf.element(root):
+                for obj in objects:
+                    if isinstance(obj, tweetworks.Post):
+                        self.__write_post_xml(xf, obj)
+                    else:
+                        xf.write(obj.xml())
+                    count += 1
+        return count
+
+    def __write_post_xml(self, xf, post):
+        # Write the post's own fields, then stream its replies one by one
+        with xf.element("post"):
+            for child in post.xml(nested = False):
+                xf.write(child)
+            if len(post.posts) > 0:
+                with xf.element("posts"):
+                    for reply in post.posts:
+                        self.__write_post_xml(xf, reply)
+            else:
+                xf.write(E("posts", E("post")))
+
+    def __read_xml(self, identity_map):
+        # Decode each child of the root as soon as it is complete
+        models = {"post" : tweetworks.Post, "user" : tweetworks.User,
+                  "group" : tweetworks.Group}
+        root = None
+        for event, element in lxml.etree.iterparse(self.path,
+                                                   events = ("start", "end")):
+            # Remember the root so that finished children can be dropped
+            if root == None:
+                root = element
+                continue
+            if event != "end" or element.getparent() is not root:
+                continue
+
+            # Build the object, then free the element and any before it
+            if element.tag == "post":
+                yield tweetworks.Post(element, identity_map)
+            else:
+                yield models[element.tag](element)
+            element.clear()
+            while element.getprevious() is not None:
+                del root[0]
+
+    def __write_ndjson(self, output, objects):
+        # One compact object per line
+        count = 0
+        for obj in objects:
+            output.write(json.dumps(self.__encode(obj),
+                                    separators = (",", ":")))
+            output.write("\n")
+            count += 1
+        return count
+
+    def __read_ndjson(self):
+        # Decode one line at a time, sharing identical users and groups
+        shared = {}
+        archive = open(self.path, "rb")
+        try:
+            for line in archive:
+                if line.strip() != "":
+                    yield self.__decode(json.loads(line), shared)
+        finally:
+            archive.close()
+
+    def __encode(self, obj):
+        """
+        Returns a JSON-ready dict of the object's fields and its type.
+        """
+
+        # Users
+        if isinstance(obj, tweetworks.User):
+            return {"type" : "user", "id" : obj.id,
+                    "username" : obj.username, "avatar_url" : obj.avatar_url,
+                    "name" : obj.name, "twitter_id" : obj.twitter_id}
+
+        # Groups
+        if isinstance(obj, tweetworks.Group):
+            return {"type" : "group", "id" : obj.id, "name" : obj.name,
+                    "private" : obj.private, "description" : obj.description}
+
+        # Posts, with their user, group and replies
+        data = {"type" : "post", "id" : obj.id, "user_id" : obj.user_id,
+                "group_id" : obj.group_id, "parent_id" : obj.parent_id,
+                "twitter_id" : obj.twitter_id, "bingo" : obj.bingo,
+                "body" : obj.body,
+                "created" : str(obj.created).replace(" ", "T"),
+                "replies" : obj.replies, "user" : None, "group" : None,
+                "posts" : [self.__encode(reply) for reply in obj.posts]}
+        if obj.user != None:
+            data["user"] = self.__encode(obj.user)
+        if obj.group != None:
+            data["group"] = self.__encode(obj.group)
+        return data
+
+    def __decode(self, data, shared):
+        """
+        Builds a Post, User or Group from an encoded dict, reusing the users
+        and groups in shared, by type and ID, if their fields are the same.
+        """
+
+        # Reuse users and groups that have already been decoded, unless the
+        # archive has a different version of them here
+        key = (data["type"], data["id"])
+        if key in shared and shared[key][0] == data:
+            return shared[key][1]
+
+        # Users
+        if data["type"] == "user":
+            user = tweetworks.User()
+            (user.id, user.username, user.avatar_url, user.name,
+             user.twitter_id) = (data["id"], data["username"],
+                                 data["avatar_url"], data["name"],
+                                 data["twitter_id"])
+            if user.id != None:
+                shared[key] = (data, user)
+            return user
+
+        # Groups
+        if data["type"] == "group":
+            group = tweetworks.Group()
+            group.id, group.name, group.private, group.description = (
+                data["id"], data["name"], data["private"],
+                data["description"])
+            if group.id != None:
+                shared[key] = (data, group)
+            return group
+
+        # Posts, with their user, group and replies
+        post = tweetworks.Post()
+        (post.id, post.user_id, post.group_id, post.parent_id,
+         post.twitter_id, post.bingo, post.body, post.replies) = (
+            data["id"], data["user_id"], data["group_id"], data["parent_id"],
+            data["twitter_id"], data["bingo"], data["body"], data["replies"])
+        post.created = tweetworks.Timestamp.DEFAULT.parse(
+            data["created"])
+        if data["user"] != None:
+            post.user = self.__decode(data["user"], shared)
+        if data["group"] != None:
+            post.group = self.__decode(data["group"], shared)
+        post.posts = [self.__decode(reply, shared) for reply in data["posts"]]
+        return post
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+Call the Tweetworks API without blocking the caller.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import collections
+import sys
+import threading
+
+# Tweetworks includes
+import tweetworks
+
+class _BackgroundIterator:
+    """
+    Runs an iterator on a WorkerPool, buffering up to a limited number of
+    items ahead of the consumer. Items are pulled by tasks submitted to the
+    pool whenever the buffer has room, so iterators share the pool's bound
+    on concurrent requests and start no threads of their own.
+    """
+
+    def __init__(self, iterable, buffer_size, workers):
+        # The underlying iterator, only ever advanced by one task at a time
+        self.__source = iter(iterable)
+        self.__buffer_size = max(1, buffer_size)
+        self.__workers = workers
+
+        # Items waiting to be consumed, as (True, item), ending with
+        # (False, exc_info) if the iterator failed
+        self.__buffer = collections.deque()
+        self.__condition = threading.Condition()
+
+        # Whether a task is pulling items, whether nothing more will be
+        # pulled, and whether the consumer has stopped
+        self.__running = False
+        self.__exhausted = False
+        self.__closed = False
+
+        # Start producing
+        self.__condition.acquire()
+        try:
+            self.__schedule()
+        finally:
+            self.__condition.release()
+
+    def __del__(self):
+        # Abandoned iterators stop fetching and clean up their source
+        self.close()
+
+    def __schedule(self):
+        # Pull more items unless a task already is, or there's no need; the
+        # condition must be held
+        if self.__running or self.__exhausted or \
+           len(self.__buffer) >= self.__buffer_size:
+            return
+        self.__running = True
+        self.__workers.submit(self.__fill)
+
+    def __fill(self):
+        """
+        Pulls items into the buffer until it is full or the iterator ends,
+        on one of the pool's threads.
+        """
+
+        closed = False
+        while True:
+            # Stop once the buffer is full, the iterator has ended or the
+            # consumer is gone
+            self.__condition.acquire()
+            try:
+                if self.__closed or self.__exhausted or \
+                   len(self.__buffer) >= self.__buffer_size:
+                    self.__running = False
+                    closed = self.__closed
+                    break
+            finally:
+                self.__condition.release()
+
+            # Pull the next item, fetching another page if need be
+            try:
+                entry = (True, self.__source.next())
+            except StopIteration:
+                entry = None
+            except Exception:
+                entry = (False, sys.exc_info())
+
+            # Hand it to the consumer, unless they've stopped listening
+            self.__condition.acquire()
+            try:
+                if not self.__closed:
+                    if entry == None or not entry[0]:
+                        self.__exhausted = True
+                    if entry != None:
+                        self.__buffer.append(entry)
+                    self.__condition.notify_all()
+            finally:
+                self.__condition.release()
+
+        # The consumer closed the iterator while we were pulling from it
+        if closed and hasattr(self.__source, "close"):
+            self.__source.close()
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        # Wait for the next item, or the end
+        self.__condition.acquire()
+        try:
+            while len(self.__buffer) == 0 and not self.__exhausted:
+                self.__condition.wait()
+            if len(self.__buffer) == 0:
+                raise StopIteration
+            ok, item = self.__buffer.popleft()
+
+            # Refill the buffer in the background
+            if ok:
+                self.__schedule()
+        finally:
+            self.__condition.release()
+
+        # Re-raise any failure
+        if not ok:
+            raise item[0], item[1], item[2]
+        return item
+
+    def close(self):
+        """
+        Stops fetching; no further pages are requested, and the underlying
+        iterator is closed so that its own cleanup runs.
+        """
+
+        # Stop any further pulls and drop what was buffered
+        self.__condition.acquire()
+        try:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__exhausted = True
+            self.__buffer.clear()
+            running = self.__running
+            self.__condition.notify_all()
+        finally:
+            self.__condition.release()
+
+        # A running task closes the iterator when its pull returns
+        if not running and hasattr(self.__source, "close"):
+            self.__source.close()
+
+class AsyncAPI:
+    """
+    Mirrors the tweetworks.API methods, but each call returns immediately with
+    a tweetworks.Future instead of blocking. Calls run on a bounded pool of
+    threads, so at most max_concurrency requests are in progress at once, and
+    the responses are decoded into Post, User and Group objects exactly as by
+    tweetworks.API.
+
+    Futures support add_done_callback, so results can be handed to any event
+    loop. The iter_* methods return iterators whose pages are fetched in the
+    background, on the same bounded pool, while the consumer works through
+    the previous ones. Close iterators that aren't read to the end; they
+    are also closed when no longer referenced.
+    """
+
+    def __init__(self, api_key, username = "", password = "", max_concurrency = 4, buffer_size = 100, **options):
+        """
+        The API key, username, password and any other keyword options are
+        passed on to tweetworks.API.
+
+        max_concurrency - int - The most calls to run at once
+        buffer_size - int - How many objects an iter_* iterator may fetch
+                            ahead of its consumer
+        """
+
+        # The synchronous API does the work
+        options.setdefault("pool_size", max_concurrency)
+        self.api = tweetworks.API(api_key, username, password, **options)
+        self.buffer_size = buffer_size
+
+        # Calls run on a bounded pool of threads
+        self.workers = tweetworks.WorkerPool(max_concurrency)
+
+    def close(self):
+        """
+        Waits for submitted calls to finish, then stops the worker threads and
+        closes pooled connections.
+        """
+
+        self.workers.shutdown()
+        self.api.pool.close()
+
+    def __submit(self, method, args, kwargs):
+        # Run the synchronous method on the worker pool
+        return self.workers.submit(method, *args, **kwargs)
+
+    def __iterate(self, method, args, kwargs):
+        # Run the synchronous generator on the worker pool
+        return _BackgroundIterator(method(*args, **kwargs), self.buffer_size,
+                                   self.workers)
+
+    def add_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.add_posts; returns a Future of the new Post.
+        """
+
+        return self.__submit(self.api.add_posts, args, kwargs)
+
+    def contributed_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.contributed_posts; returns a Future of a Post list.
+        """
+
+        return self.__submit(self.api.contributed_posts, args, kwargs)
+
+    def iter_contributed_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_contributed_posts.
+        """
+
+        return self.__iterate(self.api.iter_contributed_posts, args, kwargs)
+
+    def group_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.group_posts; returns a Future of a Post list.
+        """
+
+        return self.__submit(self.api.group_posts, args, kwargs)
+
+    def iter_group_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_group_posts.
+        """
+
+        return self.__iterate(self.api.iter_group_posts, args, kwargs)
+
+    def index_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.index_posts; returns a Future of a Post list.
+        """
+
+        return self.__submit(self.api.index_posts, args, kwargs)
+
+    def iter_index_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_index_posts.
+        """
+
+        return self.__iterate(self.api.iter_index_posts, args, kwargs)
+
+    def joined_groups_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.joined_groups_posts; returns a Future of a Post
+        list.
+        """
+
+        return self.__submit(self.api.joined_groups_posts, args, kwargs)
+
+    def iter_joined_groups_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_joined_groups_posts.
+        """
+
+        return self.__iterate(self.api.iter_joined_groups_posts, args, kwargs)
+
+    def view_posts(self, *args, **kwargs):
+        """
+        See tweetworks.API.view_posts; returns a Future of the threaded Post.
+        """
+
+        return self.__submit(self.api.view_posts, args, kwargs)
+
+    def index_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.index_groups; returns a Future of a Group list.
+        """
+
+        return self.__submit(self.api.index_groups, args, kwargs)
+
+    def iter_index_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_index_groups.
+        """
+
+        return self.__iterate(self.api.iter_index_groups, args, kwargs)
+
+    def join_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.join_groups; returns a Future of the joined Group.
+        """
+
+        return self.__submit(self.api.join_groups, args, kwargs)
+
+    def joined_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.joined_groups; returns a Future of a Group list.
+        """
+
+        return self.__submit(self.api.joined_groups, args, kwargs)
+
+    def iter_joined_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_joined_groups.
+        """
+
+        return self.__iterate(self.api.iter_joined_groups, args, kwargs)
+
+    def search_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.search_groups; returns a Future of a Group list.
+        """
+
+        return self.__submit(self.api.search_groups, args, kwargs)
+
+    def iter_search_groups(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_search_groups.
+        """
+
+        return self.__iterate(self.api.iter_search_groups, args, kwargs)
+
+    def group_users(self, *args, **kwargs):
+        """
+        See tweetworks.API.group_users; returns a Future of a User list.
+        """
+
+        return self.__submit(self.api.group_users, args, kwargs)
+
+    def iter_group_users(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_group_users.
+        """
+
+        return self.__iterate(self.api.iter_group_users, args, kwargs)
+
+    def index_users(self, *args, **kwargs):
+        """
+        See tweetworks.API.index_users; returns a Future of a User list.
+        """
+
+        return self.__submit(self.api.index_users, args, kwargs)
+
+    def iter_index_users(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_index_users.
+        """
+
+        return self.__iterate(self.api.iter_index_users, args, kwargs)
+
+    def search_users(self, *args, **kwargs):
+        """
+        See tweetworks.API.search_users; returns a Future of a User list.
+        """
+
+        return self.__submit(self.api.search_users, args, kwargs)
+
+    def iter_search_users(self, *args, **kwargs):
+        """
+        See tweetworks.API.iter_search_users.
+        """
+
+        return self.__iterate(self.api.iter_search_users, args, kwargs)
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Keep Tweetworks API HTTP connections alive between requests.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import errno
+import socket
+import httplib
+import urllib2
+import threading
+import time
+
+class ConnectionPool:
+    """
+    Holds idle keep-alive HTTP connections, keyed by host, so that consecutive
+    requests to the same host reuse a TCP connection instead of opening a new
+    one for every page.
+    """
+
+    def __init__(self, max_per_host = 4, idle_timeout = 30.0):
+        """
+        max_per_host - int - How many idle connections to keep for each host;
+                             0 disables keep-alive entirely
+        idle_timeout - float - Seconds an idle connection may sit in the pool
+                               before it is closed
+        """
+
+        # Store the pool options
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+
+        # Idle connections are stored per host as (connection, last used) pairs
+        self.__idle = {}
+        self.__lock = threading.Lock()
+
+    def acquire(self, host, timeout = socket._GLOBAL_DEFAULT_TIMEOUT):
+        """
+        Returns a (connection, reused) pair for the specified host, reusing
+        the most recently released idle connection if there is one.
+        """
+
+        # Drop any connections that have been idle too long
+        self.evict_idle()
+
+        # Take the most recently used idle connection, if any
+        self.__lock.acquire()
+        try:
+            idle = self.__idle.get(host, [])
+            if len(idle) > 0:
+                connection = idle.pop()[0]
+            else:
+                connection = None
+        finally:
+            self.__lock.release()
+
+        # Open a new connection if none were waiting
+        if connection == None:
+            return (httplib.HTTPConnection(host, timeout = timeout), False)
+
+        # Apply this request's timeout to the reused socket
+        connection.timeout = timeout
+        if connection.sock != None and timeout != socket._GLOBAL_DEFAULT_TIMEOUT:
+            connection.sock.settimeout(timeout)
+        return (connection, True)
+
+    def release(self, host, connection):
+        """
+        Returns a connection whose response has been completely read to the
+        pool. The connection is closed instead if the pool for that host is
+        already full.
+        """
+
+        # Keep the connection if there is room for it
+        self.__lock.acquire()
+        try:
+            idle = self.__idle.setdefault(host, [])
+            if len(idle) < self.max_per_host:
+                idle.append((connection, time.time()))
+                return
+        finally:
+            self.__lock.release()
+
+        # Otherwise hang up
+        connection.close()
+
+    def evict_idle(self):
+        """
+        Closes every pooled connection that has been idle longer than the idle
+        timeout.
+        """
+
+        # Split the idle connections into expired and live ones
+        expired = []
+        cutoff = time.time() - self.idle_timeout
+        self.__lock.acquire()
+        try:
+            for host, idle in self.__idle.items():
+                expired.extend([c for (c, used) in idle if used < cutoff])
+                self.__idle[host] = [(c, used) for (c, used) in idle
+                                     if used >= cutoff]
+        finally:
+            self.__lock.release()
+
+        # Close the expired connections outside of the lock
+        for connection in expired:
+            connection.close()
+
+    def close(self):
+        """
+        Closes every idle connection in the pool.
+        """
+
+        # Empty the pool
+        self.__lock.acquire()
+        try:
+            idle = self.__idle
+            self.__idle = {}
+        finally:
+            self.__lock.release()
+
+        # Close the connections outside of the lock
+        for connections in idle.values():
+            for connection, used in connections:
+                connection.close()
+
+class _PooledResponse:
+    """
+    Wraps an httplib response so that its connection is handed back to the
+    pool once the body has been completely read.
+    """
+
+    def __init__(self, pool, host, connection, response):
+        self.pool = pool
+        self.host = host
+        self.connection = connection
+        self.response = response
+
+    def read(self, amt = None):
+        # Read from the underlying response
+        data = self.response.read(amt)
+
+        # Release the connection as soon as the body is exhausted
+        if self.response.isclosed():
+            self.__finish()
+        return data
+
+    # socket._fileobject reads through recv()
+    recv = read
+
+    def close(self):
+        # An unfinished body leaves the connection in an unusable state
+        if self.connection != None and not self.response.isclosed():
+            self.connection.close()
+            self.connection = None
+        self.__finish()
+
+    def __finish(self):
+        # Hand the connection back exactly once
+        if self.connection != None:
+            if self.response.will_close:
+                self.connection.close()
+            else:
+                self.pool.release(self.host, self.connection)
+            self.connection = None
+
+class KeepAliveHandler(urllib2.HTTPHandler):
+    """
+    A urllib2 handler that sends HTTP requests over pooled keep-alive
+    connections. It can be combined with any other urllib2 handler, such as
+    HTTPBasicAuthHandler, via urllib2.build_opener.
+    """
+
+    def __init__(self, pool):
+        urllib2.HTTPHandler.__init__(self)
+        self.pool = pool
+
+    def http_open(self, req):
+        """
+        Sends the request over a pooled connection and returns a urllib2-style
+        response object.
+        """
+
+        # Check that there is somewhere to send the request
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError("no host given")
+
+        # Merge the request headers the same way urllib2 does, but without
+        # forcing the connection closed
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items()
+                            if k not in headers))
+        headers = dict((name.title(), value) for name, value in headers.items())
+
+        # Send the request, retrying once on a fresh connection if a reused
+        # one turns out to have been closed by the server in the meantime
+        connection, reused = self.pool.acquire(host, req.timeout)
+        try:
+            try:
+                response = self.__send(connection, req, headers)
+            except (socket.error, httplib.HTTPException), e:
+                connection.close()
+                if not (reused and self.__stale(e)):
+                    raise
+                connection = httplib.HTTPConnection(host,
+                                                    timeout = req.timeout)
+                response = self.__send(connection, req, headers)
+        except socket.error, e:
+            connection.close()
+            raise urllib2.URLError(e)
+
+        # Wrap the response like urllib2.AbstractHTTPHandler.do_open does
+        pooled = _PooledResponse(self.pool, host, connection, response)
+        fp = socket._fileobject(pooled, close = True)
+        wrapped = urllib2.addinfourl(fp, response.msg, req.get_full_url())
+        wrapped.code = response.status
+        wrapped.msg = response.reason
+        return wrapped
+
+    def __send(self, connection, req, headers):
+        """
+        Sends the request over the connection and returns its response.
+        Errors while sending are marked, so that __stale can tell them from
+        errors once the request has gone out.
+        """
+
+        # Send the request
+        try:
+            connection.request(req.get_method(), req.get_selector(), req.data,
+                               headers)
+        except socket.error, e:
+            e.while_sending = True
+            raise
+
+        # Wait for the response
+        return connection.getresponse(buffering = True)
+
+    def __stale(self, error):
+        """
+        Returns whether the error shows that a reused connection had been
+        closed by the server before it received the request, so that the
+        request can safely be sent again, even if it changes something.
+        """
+
+        # A timeout may mean the server is still working on the request
+        if isinstance(error, socket.timeout):
+            return False
+
+        # The server hung up before we finished sending
+        if isinstance(error, socket.error):
+            return getattr(error, "while_sending", False) and \
+                   error.errno in (errno.EPIPE, errno.ECONNRESET)
+
+        # The server hung up without sending a single byte of a response
+        if isinstance(error, httplib.BadStatusLine):
+            return error.line in ("", "''") or \
+                   error.line.startswith("No status line received")
+        return False
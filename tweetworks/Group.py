@@ -41,11 +41,14 @@ The term "Twitter" is Copyright © 2009 Twitter, Inc.
 import lxml.etree
 from lxml.builder import E
 
-class Group:
+class Group(object):
     """
     Represents the data fields of a single Tweetworks group.
     """
 
+    # Groups are embedded in every group post, so don't give each a __dict__
+    __slots__ = ("id", "name", "private", "description")
+
     def __init__(self, xml = None):
         """
         Reads group fields from the XML, or create an empty group.
@@ -64,25 +67,56 @@ class Group:
             self.description = ""
             return
 
-        # Group ID
-        self.id = int(xml.xpath("/group/id/text()")[0])
+        # Read fields relative to the <group> element itself, which may be
+        # nested in a larger document; no need to copy it out first
+        if hasattr(xml, "getroot"):
+            xml = xml.getroot()
+
+        # Optional fields default to empty, as does the name if its element
+        # has no text
+        self.name = u""
+        self.private = False
+        self.description = ""
+
+        # Read every field in a single pass over the child elements
+        for child in xml:
+            tag = child.tag
+            text = child.text
+
+            # Group ID
+            if tag == "id":
+                self.id = int(text)
+
+            # Group name
+            elif tag == "name":
+                if text != None:
+                    self.name = unicode(text)
+
+            # Whether or not this group is private
+            elif tag == "private":
+                self.private = (text == "1")
+
+            # Prose description of the group
+            elif tag == "description":
+                if text != None:
+                    self.description = unicode(text)
+
+    def __getstate__(self):
+        """
+        Returns the fields that have been set, for pickling; classes with
+        __slots__ have no __dict__ for pickle to save.
+        """
 
-        # Group name
-        self.name = unicode(xml.xpath("/group/name/text()")[0])
+        return dict([(name, getattr(self, name)) for name in Group.__slots__
+                     if hasattr(self, name)])
 
-        # Whether or not this group is private
-        private = xml.xpath("/group/private/text()")
-        if len(private) == 1 and private[0] == "1":
-            self.private = True
-        else:
-            self.private = False
+    def __setstate__(self, state):
+        """
+        Restores the fields saved by __getstate__.
+        """
 
-        # Prose description of the group
-        description = xml.xpath("/group/description/text()")
-        if len(description) == 1:
-            self.description = unicode(description[0])
-        else:
-            self.description = ""
+        for name, value in state.iteritems():
+            setattr(self, name, value)
 
     def __str__(self):
         """
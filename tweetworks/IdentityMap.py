@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Share one User or Group object per Tweetworks ID while decoding responses.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import threading
+from collections import OrderedDict
+
+# Tweetworks includes
+import tweetworks
+
+class IdentityMap:
+    """
+    Remembers the most recently decoded User and Group objects by ID, so that
+    every post by the same user, or in the same group, refers to a single
+    shared object instead of its own copy.
+
+    The first decoding of an ID wins; later elements with the same ID are not
+    decoded at all, so fields that change on the server are not refreshed
+    until the object has been evicted.
+    """
+
+    def __init__(self, max_size = 10000):
+        """
+        max_size - int - How many users, and separately how many groups, to
+                         remember; the least recently used are evicted first
+        """
+
+        # Store the size cap
+        self.max_size = max_size
+
+        # Objects by ID, least recently used first
+        self.__users = OrderedDict()
+        self.__groups = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def user(self, xml):
+        """
+        Returns the User for the specified <user> element, decoding it only if
+        its ID has not been seen recently.
+        """
+
+        return self.__lookup(self.__users, tweetworks.User, xml)
+
+    def group(self, xml):
+        """
+        Returns the Group for the specified <group> element, decoding it only
+        if its ID has not been seen recently.
+        """
+
+        return self.__lookup(self.__groups, tweetworks.Group, xml)
+
+    def __lookup(self, objects, model, xml):
+        """
+        Returns the shared object for the element's ID, decoding it with the
+        specified model class if necessary.
+        """
+
+        # Elements without an ID can't be shared
+        id = xml.findtext("id")
+        if not id:
+            return model(xml)
+
+        # Reuse the known object, marking it as recently used
+        self.__lock.acquire()
+        try:
+            if id in objects:
+                shared = objects.pop(id)
+                objects[id] = shared
+                return shared
+        finally:
+            self.__lock.release()
+
+        # Decode a new object outside of the lock
+        shared = model(xml)
+
+        # Remember it, evicting the least recently used objects if necessary
+        self.__lock.acquire()
+        try:
+            shared = objects.setdefault(id, shared)
+            while len(objects) > self.max_size:
+                objects.popitem(last = False)
+        finally:
+            self.__lock.release()
+
+        # Return the shared object
+        return shared
+
+    def clear(self):
+        """
+        Forgets every remembered object.
+        """
+
+        self.__lock.acquire()
+        try:
+            self.__users.clear()
+            self.__groups.clear()
+        finally:
+            self.__lock.release()
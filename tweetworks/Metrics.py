@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Aggregate per-request Tweetworks API measurements.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import collections
+import threading
+
+class Metrics:
+    """
+    An API hook that aggregates request events per API method: exact counts
+    and totals, plus percentiles over the most recent max_samples requests.
+
+    api.add_hook(metrics) starts collecting; summary() reports.
+    """
+
+    # The numeric event fields that are aggregated
+    FIELDS = ("latency", "wire_bytes", "bytes", "parse_time", "decode_time",
+              "objects")
+
+    def __init__(self, max_samples = 10000):
+        """
+        max_samples - int - How many recent requests per method to keep for
+                            percentiles
+        """
+
+        self.max_samples = max_samples
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Discards everything collected so far.
+        """
+
+        self.__lock.acquire()
+        try:
+            self.__methods = {}
+        finally:
+            self.__lock.release()
+
+    def __call__(self, event):
+        """
+        Records an API request event.
+        """
+
+        self.__lock.acquire()
+        try:
+            # Start tracking new methods
+            method = self.__methods.get(event["method"])
+            if method == None:
+                method = {"requests" : 0, "cached" : 0, "errors" : 0,
+                          "attempts" : 0,
+                          "totals" : dict([(field, 0)
+                                           for field in Metrics.FIELDS]),
+                          "samples" : dict([(field,
+                                             collections.deque(
+                                                 maxlen = self.max_samples))
+                                            for field in Metrics.FIELDS])}
+                self.__methods[event["method"]] = method
+
+            # Count the request and sample its measurements
+            method["requests"] += 1
+            method["cached"] += int(event["cached"])
+            method["errors"] += int(event.get("error") != None)
+            method["attempts"] += event["attempts"]
+            for field in Metrics.FIELDS:
+                method["totals"][field] += event[field]
+                method["samples"][field].append(event[field])
+        finally:
+            self.__lock.release()
+
+    def methods(self):
+        """
+        Returns the names of the methods seen so far.
+        """
+
+        self.__lock.acquire()
+        try:
+            return sorted(self.__methods.keys())
+        finally:
+            self.__lock.release()
+
+    def percentile(self, method, field, p):
+        """
+        Returns the p-th percentile (0-100) of the field over the method's
+        recent requests, or None if there are none.
+        """
+
+        self.__lock.acquire()
+        try:
+            if method not in self.__methods:
+                return None
+            samples = sorted(self.__methods[method]["samples"][field])
+        finally:
+            self.__lock.release()
+        return self.__percentile(samples, p)
+
+    def __percentile(self, samples, p):
+        # Nearest rank on sorted samples
+        if len(samples) == 0:
+            return None
+        rank = int(round(p / 100.0 * (len(samples) - 1)))
+        return samples[max(0, min(len(samples) - 1, rank))]
+
+    def summary(self):
+        """
+        Returns a dict of method name to a dict with the request, cached,
+        failed and attempt counts, and for each field its total, mean, p50, p90 and p99.
+        """
+
+        self.__lock.acquire()
+        try:
+            summary = {}
+            for name, method in self.__methods.iteritems():
+                report = {"requests" : method["requests"],
+                          "cached" : method["cached"],
+                          "errors" : method["errors"],
+                          "attempts" : method["attempts"]}
+                for field in Metrics.FIELDS:
+                    samples = sorted(method["samples"][field])
+                    total = method["totals"][field]
+                    report[field] = {
+                        "total" : total,
+                        "mean" : float(total) / method["requests"],
+                        "p50" : self.__percentile(samples, 50),
+                        "p90" : self.__percentile(samples, 90),
+                        "p99" : self.__percentile(samples, 99)}
+                summary[name] = report
+            return summary
+        finally:
+            self.__lock.release()
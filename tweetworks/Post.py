@@ -38,21 +38,39 @@ The term "Twitter" is Copyright © 2009 Twitter, Inc.
 """
 
 # System includes
-import iso8601
+import datetime
 import lxml.etree
 from lxml.builder import E
 
 # Tweetworks includes
 import tweetworks
 
-class Post:
+class Post(object):
     """
     Represents the data fields of a single Tweetworks post.
     """
 
-    def __init__(self, xml = None):
+    # Posts are numerous, so don't give each one a __dict__; lazy posts also
+    # keep their source element and identity map until fully decoded
+    __slots__ = ("id", "user_id", "group_id", "parent_id", "twitter_id",
+                 "bingo", "body", "created", "group", "user", "replies",
+                 "posts", "__xml", "__identity_map")
+
+    # Fields that a lazy post decodes together in one pass, on first use
+    __SCALARS = frozenset(["id", "user_id", "group_id", "parent_id",
+                           "twitter_id", "bingo", "body", "replies"])
+
+    def __init__(self, xml = None, identity_map = None, lazy = False):
         """
-        Reads post fields from the XML, or create an empty post.
+        Reads post fields from the XML, or create an empty post. If an
+        identity_map (tweetworks.IdentityMap) is specified, the post's user
+        and group are shared with other posts decoded through the same map.
+
+        If lazy is True, nothing is decoded up front: the post keeps the
+        element, and its fields are decoded as they are first read (the
+        simple fields all at once; created, user, group and posts each on
+        their own), then kept. Replies are lazy as well. The element, and so
+        its whole document, stays in memory as long as the post does.
 
         id - int - Tweetworks numeric post ID
         user_id - int - Tweetworks numeric user ID of poster
@@ -68,6 +86,10 @@ class Post:
         posts - tweetworks.Post[] - The Post object replies to this post, if any
         """
 
+        # Eagerly decoded posts don't keep their XML
+        self.__xml = None
+        self.__identity_map = None
+
         # Initialize an empty post if no XML was provided
         if xml == None:
             self.id = None
@@ -84,69 +106,200 @@ class Post:
             self.posts = []
             return
 
-        # Post ID
-        self.id = int(xml.xpath("/post/id/text()")[0])
+        # Read fields relative to the <post> element itself, which may be
+        # nested in a larger document; no need to copy it out first
+        if hasattr(xml, "getroot"):
+            xml = xml.getroot()
 
-        # Tweetworks User ID
-        self.user_id = int(xml.xpath("/post/user_id/text()")[0])
+        # Lazy posts decode their fields when they're first read
+        if lazy:
+            self.__xml = xml
+            self.__identity_map = identity_map
+            return
 
-        # Group ID, if the post wasn't public
-        group_id = xml.xpath("/post/group_id/text()")
-        if len(group_id) == 1:
-            self.group_id = int(group_id[0])
-        else:
-            self.group_id = None
+        # Read the simple fields, and find the rest, in a single pass over
+        # the child elements
+        created_xml, group_xml, user_xml, posts_xml = self.__read_scalars(xml)
 
-        # Parent ID, if the post was a reply
-        parent_id = xml.xpath("/post/parent_id/text()")
-        if len(parent_id) == 1:
-            self.parent_id = int(parent_id[0])
-        else:
-            self.parent_id = None
-        
-        # Twitter ID of the post, if it was cross-posted
-        twitter_id = xml.xpath("/post/twitter_id/text()")
-        if len(twitter_id) == 1:
-            self.twitter_id = int(twitter_id[0])
-        else:
-            self.twitter_id = None
+        # The timestamp of the post
+        if created_xml != None:
+            self.created = tweetworks.Timestamp.DEFAULT.parse(
+                created_xml.text)
 
-        # Whether or not this post has been marked as a Bingo
-        bingo = xml.xpath("/post/bingo/text()")
-        if len(bingo) == 1 and bingo[0] == "1":
-            self.bingo = True
-        else:
-            self.bingo = False
+        # Group and author metadata
+        self.group = self.__read_group(group_xml, identity_map)
+        self.user = self.__read_user(user_xml, identity_map)
 
-        # The text contents of the post
-        self.body = unicode(xml.xpath("/post/body/text()")[0])
+        # The replies to this post, if any
+        self.posts = self.__read_posts(posts_xml, identity_map, False)
 
-        # The timestamp of the post
-        self.created = iso8601.parse_date(xml.xpath("/post/created/text()")[0])
+    def __getattr__(self, name):
+        """
+        Decodes a field of a lazy post on first access.
+        """
 
-        # The number of replies to this post, if any
-        replies = xml.xpath("/post/replies/text()")
-        if len(replies) == 1:
-            self.replies = int(replies[0])
+        # Only the fields of lazy posts are decoded on demand
+        if name.startswith("_"):
+            raise AttributeError(name)
+        xml = self.__xml
+        if xml == None:
+            raise AttributeError(name)
+        identity_map = self.__identity_map
+
+        # The simple fields all come from a single pass, which mustn't
+        # overwrite any that have been assigned already
+        if name in Post.__SCALARS:
+            assigned = {}
+            for field in Post.__SCALARS:
+                try:
+                    assigned[field] = object.__getattribute__(self, field)
+                except AttributeError:
+                    pass
+            self.__read_scalars(xml)
+            for field, value in assigned.iteritems():
+                setattr(self, field, value)
+        elif name == "created":
+            self.created = tweetworks.Timestamp.DEFAULT.parse(
+                xml.findtext("created"))
+        elif name == "group":
+            self.group = self.__read_group(xml.find("group"), identity_map)
+        elif name == "user":
+            self.user = self.__read_user(xml.find("user"), identity_map)
+        elif name == "posts":
+            self.posts = self.__read_posts(xml.find("posts"), identity_map,
+                                           True)
         else:
-            self.replies = 0
+            raise AttributeError(name)
 
+        # Return the now-decoded field
+        return object.__getattribute__(self, name)
+
+    def __getstate__(self):
+        """
+        Returns the fields that have been set, for pickling; classes with
+        __slots__ have no __dict__ for pickle to save. Lazy posts are fully
+        decoded first, and their element and identity map aren't saved.
+        """
+
+        state = {}
+        for name in Post.__slots__:
+            if name.startswith("__"):
+                continue
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores the fields saved by __getstate__, as an eagerly decoded
+        post.
+        """
+
+        self.__xml = None
+        self.__identity_map = None
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
+    def __read_scalars(self, xml):
+        """
+        Reads the simple fields from the post's child elements, and returns
+        the <created>, <group>, <user> and <posts> elements (or None).
+        """
+
+        # Optional fields default to empty
+        self.group_id = None
+        self.parent_id = None
+        self.twitter_id = None
+        self.bingo = False
+        self.body = ""
+        self.replies = 0
+        created_xml = None
+        group_xml = None
+        user_xml = None
+        posts_xml = None
+
+        # Read every field in a single pass over the child elements
+        for child in xml:
+            tag = child.tag
+            text = child.text
+
+            # Post ID
+            if tag == "id":
+                self.id = int(text)
+
+            # Tweetworks User ID
+            elif tag == "user_id":
+                self.user_id = int(text)
+
+            # Group ID, if the post wasn't public
+            elif tag == "group_id":
+                if text != None:
+                    self.group_id = int(text)
+
+            # Parent ID, if the post was a reply
+            elif tag == "parent_id":
+                if text != None:
+                    self.parent_id = int(text)
+
+            # Twitter ID of the post, if it was cross-posted
+            elif tag == "twitter_id":
+                if text != None:
+                    self.twitter_id = int(text)
+
+            # Whether or not this post has been marked as a Bingo
+            elif tag == "bingo":
+                self.bingo = (text == "1")
+
+            # The text contents of the post
+            elif tag == "body":
+                if text != None:
+                    self.body = unicode(text)
+
+            # The number of replies to this post, if any
+            elif tag == "replies":
+                if text != None:
+                    self.replies = int(text)
+
+            # The timestamp, metadata and replies, decoded separately
+            elif tag == "created":
+                created_xml = child
+            elif tag == "group":
+                if group_xml == None:
+                    group_xml = child
+            elif tag == "user":
+                if user_xml == None:
+                    user_xml = child
+            elif tag == "posts":
+                posts_xml = child
+
+        # Return the elements that weren't decoded
+        return created_xml, group_xml, user_xml, posts_xml
+
+    def __read_group(self, group_xml, identity_map):
         # Group metadata, if the post wasn't public
-        if self.group_id != None:
-            group_string = lxml.etree.tostring(xml.xpath("/post/group")[0])
-            self.group = tweetworks.Group(lxml.etree.fromstring(group_string))
+        if self.group_id == None:
+            return None
+        elif identity_map != None:
+            return identity_map.group(group_xml)
         else:
-            self.group = None
+            return tweetworks.Group(group_xml)
 
+    def __read_user(self, user_xml, identity_map):
         # Post author metadata
-        user_string = lxml.etree.tostring(xml.xpath("/post/user")[0])
-        self.user = tweetworks.User(lxml.etree.fromstring(user_string))
+        if identity_map != None:
+            return identity_map.user(user_xml)
+        else:
+            return tweetworks.User(user_xml)
 
+    def __read_posts(self, posts_xml, identity_map, lazy):
         # The replies to this post, if any (select only non-empty child posts)
-        self.posts = []
-        for post_xml in xml.xpath("/post/posts/post[node()]"):
-            post_string = lxml.etree.tostring(post_xml)
-            self.posts.append(Post(lxml.etree.fromstring(post_string)))
+        if posts_xml == None:
+            return []
+        return [Post(post_xml, identity_map, lazy) for post_xml in posts_xml
+                if post_xml.tag == "post" and (len(post_xml) > 0 or
+                                               post_xml.text != None)]
 
     def __str__(self):
         """
@@ -163,9 +316,10 @@ class Post:
 
         return "tweetworks.Post(lxml.etree.parsestring(%s))" % repr(str(self))
 
-    def xml(self):
+    def xml(self, nested = True):
         """
-        Generates an XML element tree for this Post.
+        Generates an XML element tree for this Post, including its replies
+        unless nested is False.
         """
 
         # Construct the XML tree representing this Post
@@ -200,10 +354,10 @@ class Post:
             xml.append(self.user.xml())
 
         # Append reply posts, if any
-        if len(self.posts) > 0:
+        if nested and len(self.posts) > 0:
             posts_xml = E("posts", *[post.xml() for post in self.posts])
             xml.append(posts_xml)
-        else:
+        elif nested:
             xml.append(E("posts", E("post")))
         
         # Return the XML tree (NOT a string)
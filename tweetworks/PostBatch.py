@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Hold the fields of many Tweetworks posts in compact typed columns.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import array
+import collections
+import datetime
+import threading
+
+# NumPy is optional; without it, columns are plain typed arrays
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tweetworks includes
+import tweetworks
+
+class PostBatch:
+    """
+    Keeps the id, user_id, group_id, parent_id, bingo, replies and created
+    fields of many posts in one typed array per field, with created as UTC
+    epoch seconds and every body in a single character heap, instead of in
+    a Post object each.
+
+    Batches can be decoded straight from <posts> XML (see
+    API.post_batch), built from Post lists, filtered with select or take,
+    and summarized with count_by. When NumPy is installed, column returns
+    NumPy copies of the columns and filtering is vectorized.
+
+    Missing group and parent IDs are stored as PostBatch.NONE.
+    """
+
+    # The columns and their array type codes
+    COLUMNS = (("id", "l"), ("user_id", "l"), ("group_id", "l"),
+               ("parent_id", "l"), ("bingo", "b"), ("replies", "l"),
+               ("created", "l"))
+
+    # Stands in for a missing ID
+    NONE = -1
+
+    def __init__(self, posts = []):
+        """
+        posts - tweetworks.Post[] - Posts to start with, with their replies
+        """
+
+        # One typed array per column
+        self.columns = dict([(name, array.array(code))
+                             for name, code in PostBatch.COLUMNS])
+
+        # Every body, back to back, and where each one starts
+        self.heap = array.array("u")
+        self.offsets = array.array("l", [0])
+
+        # Pages may be added from several threads
+        self.__lock = threading.Lock()
+
+        # Add the initial posts
+        self.add_posts(posts)
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def __append(self, row, body):
+        # Add one post's fields and body
+        for name, code in PostBatch.COLUMNS:
+            self.columns[name].append(row[name])
+        self.heap.fromunicode(body)
+        self.offsets.append(len(self.heap))
+
+    def add_posts(self, posts):
+        """
+        Appends the posts and their nested replies.
+        """
+
+        # Flatten the threads, replies after their parents
+        flat = []
+        pending = list(reversed(posts))
+        while len(pending) > 0:
+            post = pending.pop()
+            pending.extend(reversed(post.posts))
+            flat.append(post)
+
+        # Append their fields
+        epoch = tweetworks.Timestamp.DEFAULT.epoch
+        self.__lock.acquire()
+        try:
+            for post in flat:
+                self.__append({"id" : post.id,
+                               "user_id" : post.user_id,
+                               "group_id" : self.__id(post.group_id),
+                               "parent_id" : self.__id(post.parent_id),
+                               "bingo" : int(post.bingo),
+                               "replies" : post.replies,
+                               "created" : epoch(post.created)},
+                              post.body)
+        finally:
+            self.__lock.release()
+
+    def __id(self, id):
+        # Missing IDs are stored as NONE
+        if id == None:
+            return PostBatch.NONE
+        return id
+
+    def read_xml(self, xml):
+        """
+        Appends every post in a <posts> document (or element), and their
+        nested replies, without building Post objects. Returns the number of
+        posts added.
+        """
+
+        # Read relative to the root element
+        if hasattr(xml, "getroot"):
+            xml = xml.getroot()
+
+        # Decode each post in document order, replies after their parents
+        rows = []
+        pending = [post_xml for post_xml in xml if post_xml.tag == "post"]
+        pending.reverse()
+        while len(pending) > 0:
+            post_xml = pending.pop()
+            row = {"group_id" : PostBatch.NONE, "parent_id" : PostBatch.NONE,
+                   "bingo" : 0, "replies" : 0, "body" : u"", "created" : None}
+            replies = []
+            for child in post_xml:
+                tag = child.tag
+                text = child.text
+                if tag in ("id", "user_id", "group_id", "parent_id",
+                           "replies"):
+                    if text != None:
+                        row[tag] = int(text)
+                elif tag == "bingo":
+                    row["bingo"] = int(text == "1")
+                elif tag == "body":
+                    if text != None:
+                        row["body"] = unicode(text)
+                elif tag == "created":
+                    row["created"] = text
+                elif tag == "posts":
+                    replies = [reply for reply in child if reply.tag == "post"
+                               and (len(reply) > 0 or reply.text != None)]
+            rows.append(row)
+            pending.extend(reversed(replies))
+
+        # Convert the page's timestamps in one call
+        created = tweetworks.Timestamp.DEFAULT.parse_many(
+            [row["created"] for row in rows], epoch = True)
+
+        # Append the rows
+        self.__lock.acquire()
+        try:
+            for row, epoch in zip(rows, created):
+                row["created"] = epoch
+                self.__append(row, row["body"])
+        finally:
+            self.__lock.release()
+        return len(rows)
+
+    def extend(self, batch):
+        """
+        Appends every post in another batch.
+        """
+
+        self.__lock.acquire()
+        try:
+            for name, code in PostBatch.COLUMNS:
+                self.columns[name].extend(batch.columns[name])
+            base = len(self.heap)
+            self.heap.extend(batch.heap)
+            self.offsets.extend([base + offset
+                                 for offset in batch.offsets[1:]])
+        finally:
+            self.__lock.release()
+
+    def column(self, name):
+        """
+        Returns the named column: a read-only NumPy copy if NumPy is
+        installed, and the typed array itself otherwise.
+        """
+
+        # A typed array only exposes the old buffer interface, so a NumPy
+        # view of it would be left dangling when appending reallocates it
+        values = self.columns[name]
+        if numpy != None:
+            return numpy.frombuffer(values.tostring(),
+                                    dtype = numpy.dtype(values.typecode))
+        return values
+
+    def body(self, index):
+        """
+        Returns the body of the post at the specified row.
+        """
+
+        return self.heap[self.offsets[index]:self.offsets[index + 1]].tounicode()
+
+    def post(self, index):
+        """
+        Builds a Post from the specified row. Users, groups and time zones
+        aren't kept, so its user and group are None and created is in UTC.
+        """
+
+        post = tweetworks.Post()
+        columns = self.columns
+        post.id = columns["id"][index]
+        post.user_id = columns["user_id"][index]
+        post.group_id = columns["group_id"][index]
+        post.parent_id = columns["parent_id"][index]
+        if post.group_id == PostBatch.NONE:
+            post.group_id = None
+        if post.parent_id == PostBatch.NONE:
+            post.parent_id = None
+        post.bingo = bool(columns["bingo"][index])
+        post.replies = columns["replies"][index]
+        post.created = tweetworks.Timestamp.DEFAULT.from_epoch(
+            columns["created"][index])
+        post.body = self.body(index)
+        return post
+
+    def posts(self):
+        """
+        Returns a Post for every row, with replies as posts of their own
+        rather than nested in their parents.
+        """
+
+        return [self.post(index) for index in xrange(len(self))]
+
+    def where(self, group_id = None, user_id = None, parent_id = None, bingo = None, since = None, until = None):
+        """
+        Returns the rows matching every specified criterion: a NumPy boolean
+        mask if NumPy is installed, or a list of row numbers otherwise. Use
+        PostBatch.NONE as the group or parent ID to match public or
+        top-level posts.
+
+        since/until - datetime or epoch seconds - Inclusive creation range
+        """
+
+        # Compare the creation range in epoch seconds
+        if isinstance(since, datetime.datetime):
+            since = tweetworks.Timestamp.DEFAULT.epoch(since)
+        if isinstance(until, datetime.datetime):
+            until = tweetworks.Timestamp.DEFAULT.epoch(until)
+        equal = [(name, value) for name, value in (("group_id", group_id),
+                                                   ("user_id", user_id),
+                                                   ("parent_id", parent_id),
+                                                   ("bingo", bingo))
+                 if value != None]
+
+        # Vectorized comparisons
+        if numpy != None:
+            mask = numpy.ones(len(self), dtype = bool)
+            for name, value in equal:
+                mask &= self.column(name) == int(value)
+            if since != None:
+                mask &= self.column("created") >= since
+            if until != None:
+                mask &= self.column("created") <= until
+            return mask
+
+        # Narrow down row numbers one criterion at a time
+        rows = xrange(len(self))
+        for name, value in equal:
+            values = self.columns[name]
+            value = int(value)
+            rows = [row for row in rows if values[row] == value]
+        created = self.columns["created"]
+        if since != None:
+            rows = [row for row in rows if created[row] >= since]
+        if until != None:
+            rows = [row for row in rows if created[row] <= until]
+        return list(rows)
+
+    def take(self, rows):
+        """
+        Returns a new batch of the specified rows: row numbers, or a NumPy
+        boolean mask as returned by where.
+        """
+
+        # Turn a mask into row numbers
+        if numpy != None and isinstance(rows, numpy.ndarray):
+            if rows.dtype == bool:
+                rows = numpy.flatnonzero(rows)
+            rows = rows.tolist()
+
+        # Copy the columns and bodies of the rows
+        batch = PostBatch()
+        for name, code in PostBatch.COLUMNS:
+            values = self.columns[name]
+            batch.columns[name] = array.array(code,
+                                              [values[row] for row in rows])
+        for row in rows:
+            batch.heap.extend(self.heap[self.offsets[row]:
+                                        self.offsets[row + 1]])
+            batch.offsets.append(len(batch.heap))
+        return batch
+
+    def select(self, **criteria):
+        """
+        Returns a new batch of the rows matching the criteria; see where.
+        """
+
+        return self.take(self.where(**criteria))
+
+    def count_by(self, name, rows = None):
+        """
+        Returns a dict of each value of the named column to how many rows
+        have it, optionally only counting the specified rows (see where).
+        """
+
+        # Vectorized counting (comparing a mask with None would compare
+        # every element)
+        if numpy != None:
+            values = self.column(name)
+            if rows is not None:
+                values = values[rows]
+            keys, counts = numpy.unique(values, return_counts = True)
+            return dict(zip(keys.tolist(), counts.tolist()))
+
+        # Count with a Counter
+        values = self.columns[name]
+        if rows is not None:
+            values = [values[row] for row in rows]
+        return dict(collections.Counter(values))
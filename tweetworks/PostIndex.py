@@ -0,0 +1,522 @@
+# -*- coding: utf-8 -*-
+"""
+Search the bodies of Tweetworks posts with a local inverted index.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import os
+import re
+import array
+import bisect
+import datetime
+import itertools
+import threading
+import cPickle
+
+# Tweetworks includes
+import tweetworks
+
+class PostIndex:
+    """
+    A full-text inverted index over post bodies, fed with posts from any
+    source (API listings, a tweetworks.Archive or a tweetworks.Store).
+
+    Queries are words, which must all appear, "quoted phrases", which must
+    appear in that order, and OR between alternatives, e.g.
+
+        python "connection pool" OR lxml
+
+    AND may be written between words, but needn't be; like OR, it is only
+    an operator in uppercase. Results can be filtered by group, user and
+    creation time, and are the matching post IDs, newest first; fetch the
+    posts themselves from wherever they are kept. An empty query matches
+    every post, so that the filters alone select them.
+
+    Each post is numbered as it is added, so every word's list of posts is
+    a compact sorted array, and lists are intersected by galloping through
+    them from the newest post down. Compacting the index, which save does
+    automatically, renumbers the posts from oldest to newest, so a search
+    with a limit stops as soon as it has found enough posts. Re-adding a
+    changed post retires its old number until the index is compacted.
+    """
+
+    # Words are runs of letters and digits
+    TOKEN = re.compile(r"\w+", re.UNICODE)
+
+    # Query parts: phrases, OR, and words
+    QUERY = re.compile(r'"([^"]*)"|(\S+)', re.UNICODE)
+
+    # Stands in for a missing group ID
+    NO_GROUP = -1
+
+    def __init__(self, path = None):
+        """
+        path - string - Where to save the index; it is loaded from there if
+                        the file exists
+        """
+
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__clear()
+
+        # Load the saved index, if any
+        if path != None and os.path.exists(path):
+            self.load(path)
+
+    def __clear(self):
+        # Per-number post ID, group ID, user ID, created epoch and body
+        self.__ids = array.array("l")
+        self.__groups = array.array("l")
+        self.__users = array.array("l")
+        self.__created = array.array("l")
+        self.__bodies = []
+
+        # Numbers by post ID, retired numbers, and numbers by word
+        self.__numbers = {}
+        self.__retired = set()
+        self.__postings = {}
+
+        # How many of the first numbers are in creation order
+        self.__ordered = 0
+
+    def __len__(self):
+        """
+        Returns the number of indexed posts.
+        """
+
+        return len(self.__numbers)
+
+    def add(self, posts):
+        """
+        Indexes the posts and their nested replies, replacing any earlier
+        versions of them. Returns the number of posts that were new or
+        changed.
+
+        Searches stay fastest while posts are added oldest first, as when
+        following new posts; compact the index after adding older ones.
+        """
+
+        # Flatten the threads, oldest first
+        flat = []
+        pending = list(posts)
+        epoch = tweetworks.Timestamp.DEFAULT.epoch
+        while len(pending) > 0:
+            post = pending.pop()
+            pending.extend(post.posts)
+            flat.append((epoch(post.created), post.id, post))
+        flat.sort(key = lambda entry: entry[:2])
+
+        # Number and index each post
+        changed = 0
+        self.__lock.acquire()
+        try:
+            for created, id, post in flat:
+                # Skip posts that are already indexed as they are
+                group_id = post.group_id
+                if group_id == None:
+                    group_id = PostIndex.NO_GROUP
+                user_id = post.user_id or 0
+                number = self.__numbers.get(post.id)
+                if number != None:
+                    if (self.__bodies[number] == post.body and
+                        self.__groups[number] == group_id and
+                        self.__users[number] == user_id and
+                        self.__created[number] == created):
+                        continue
+                    self.__retired.add(number)
+
+                # Record the post under a new number, which stays in creation
+                # order if every earlier one is and it's the newest post yet
+                number = len(self.__ids)
+                if self.__ordered == number and \
+                   (number == 0 or (created, post.id) >=
+                    (self.__created[number - 1], self.__ids[number - 1])):
+                    self.__ordered += 1
+                self.__numbers[post.id] = number
+                self.__ids.append(post.id)
+                self.__groups.append(group_id)
+                self.__users.append(user_id)
+                self.__created.append(created)
+                self.__bodies.append(post.body)
+
+                # Numbers only grow, so every word's postings stay sorted;
+                # the group and user are indexed as words of their own
+                tokens = set(self.tokenize(post.body))
+                tokens.add(("group", group_id))
+                tokens.add(("user", user_id))
+                for token in tokens:
+                    postings = self.__postings.get(token)
+                    if postings == None:
+                        postings = self.__postings[token] = array.array("l")
+                    postings.append(number)
+                changed += 1
+        finally:
+            self.__lock.release()
+        return changed
+
+    def remove(self, ids):
+        """
+        Removes the posts with the specified IDs from the index.
+        """
+
+        self.__lock.acquire()
+        try:
+            for id in ids:
+                number = self.__numbers.pop(id, None)
+                if number != None:
+                    self.__retired.add(number)
+        finally:
+            self.__lock.release()
+
+    def tokenize(self, text):
+        """
+        Returns the lowercased words of the text, in order.
+        """
+
+        return PostIndex.TOKEN.findall(text.lower())
+
+    def search(self, query, group_id = None, user_id = None, since = None, until = None, limit = None):
+        """
+        Returns the IDs of the posts matching the query and every specified
+        filter, newest first.
+
+        since/until - datetime or epoch seconds - Inclusive creation range
+        limit - int - The most IDs to return
+        """
+
+        # Epoch bounds for the creation filter
+        if isinstance(since, datetime.datetime):
+            since = tweetworks.Timestamp.DEFAULT.epoch(since)
+        if isinstance(until, datetime.datetime):
+            until = tweetworks.Timestamp.DEFAULT.epoch(until)
+
+        # The group and user filters are matched like words
+        filters = []
+        if group_id != None:
+            filters.append([("group", group_id)])
+        if user_id != None:
+            filters.append([("user", user_id)])
+
+        # An empty query leaves just the filters
+        alternatives = self.__parse(query)
+        if len(alternatives) == 0:
+            if query.strip() != "":
+                return []
+            alternatives = [[]]
+
+        self.__lock.acquire()
+        try:
+            # Any alternative may match; each finds its matches among the
+            # unordered numbers, and enough of the newest ordered ones,
+            # which come newest (highest) first
+            if len(alternatives) == 1:
+                unordered, ordered = self.__match(alternatives[0] + filters,
+                                                  since, until, limit)
+            else:
+                unordered = set()
+                ordered = set()
+                for alternative in alternatives:
+                    matches = self.__match(alternative + filters, since,
+                                           until, limit)
+                    unordered.update(matches[0])
+                    ordered.update(matches[1])
+                ordered = sorted(ordered, reverse = True)
+
+            # The few unordered numbers are sorted into the ordered ones
+            if len(unordered) > 0:
+                key = lambda n: (self.__created[n], self.__ids[n])
+                ordered = self.__merge(sorted(unordered, key = key,
+                                              reverse = True), ordered, key)
+            if limit != None:
+                ordered = ordered[:limit]
+            return [self.__ids[n] for n in ordered]
+        finally:
+            self.__lock.release()
+
+    def __parse(self, query):
+        """
+        Splits a query into alternatives, each a list of terms that must all
+        match, where a term is a list of words (more than one for a phrase).
+        """
+
+        alternatives = [[]]
+        for phrase, word in PostIndex.QUERY.findall(query):
+            if word == "OR":
+                alternatives.append([])
+            elif word != "AND":
+                term = self.tokenize(phrase or word)
+                if len(term) > 0:
+                    alternatives[-1].append(term)
+        return [terms for terms in alternatives if len(terms) > 0]
+
+    def __match(self, terms, since, until, limit):
+        """
+        Returns the numbers of the live posts matching every term and created
+        within the range: all of those past the ordered numbers, and the
+        newest limit (or all) of the ordered ones, newest first.
+        """
+
+        # Every word of every term must appear
+        words = set([word for term in terms for word in term])
+        postings = [self.__postings.get(word) for word in words]
+        if None in postings:
+            return [], []
+
+        # Phrases must also appear in order, separated only by non-words
+        phrases = [re.compile(r"(?<!\w)%s(?!\w)" %
+                              r"\W+".join([re.escape(word) for word in term]),
+                              re.UNICODE | re.IGNORECASE)
+                   for term in terms if len(term) > 1]
+        def matches(number):
+            if number in self.__retired:
+                return False
+            body = self.__bodies[number]
+            for phrase in phrases:
+                if not phrase.search(body):
+                    return False
+            return True
+        if len(phrases) == 0 and len(self.__retired) == 0:
+            matches = None
+
+        # Check every match among the unordered numbers
+        created = self.__created
+        unordered = []
+        for number in self.__intersect(postings, self.__ordered,
+                                       len(self.__ids)):
+            if (since == None or created[number] >= since) and \
+               (until == None or created[number] <= until) and \
+               (matches == None or matches(number)):
+                unordered.append(number)
+
+        # The ordered numbers in the creation range are a single run, newest
+        # last, so stop once the newest enough have been found
+        low = 0
+        high = self.__ordered
+        if since != None:
+            low = bisect.bisect_left(created, since, 0, high)
+        if until != None:
+            high = bisect.bisect_right(created, until, low, high)
+        numbers = self.__intersect(postings, low, high)
+        if matches != None:
+            numbers = (number for number in numbers if matches(number))
+        if limit != None:
+            numbers = itertools.islice(numbers, limit)
+        return unordered, list(numbers)
+
+    def __intersect(self, postings, low, high):
+        """
+        Generates the numbers from high - 1 down to low that are in every
+        one of the sorted postings arrays (all numbers if there are none).
+        """
+
+        # Without postings, every number matches
+        if len(postings) == 0:
+            for number in xrange(high - 1, low - 1, -1):
+                yield number
+            return
+
+        # Search each array below where the previous search left off
+        ends = [bisect.bisect_left(numbers, high) for numbers in postings]
+        count = len(postings)
+        candidate = high - 1
+        agreed = 0
+        index = 0
+        bisect_right = bisect.bisect_right
+        while True:
+            # The next number down is usually the one we want; otherwise
+            # gallop down the array to bracket the candidate, then find the
+            # highest number at or below it
+            numbers = postings[index]
+            end = ends[index]
+            if end == 0:
+                return
+            if numbers[end - 1] > candidate:
+                top = end - 1
+                step = 2
+                bottom = 0
+                while top - step >= 0:
+                    if numbers[top - step] <= candidate:
+                        bottom = top - step + 1
+                        break
+                    top -= step
+                    step *= 2
+                end = bisect_right(numbers, candidate, bottom, top)
+                if end == 0:
+                    return
+            if numbers[end - 1] < low:
+                return
+            ends[index] = end
+
+            # Every array must agree on the candidate before it matches;
+            # otherwise the lower number is the new candidate
+            number = numbers[end - 1]
+            if number == candidate:
+                agreed += 1
+            else:
+                candidate = number
+                agreed = 1
+            if agreed == count:
+                yield candidate
+                candidate -= 1
+                agreed = 0
+            index = (index + 1) % count
+
+    def __merge(self, first, second, key):
+        # Merges two lists of numbers sorted by descending key
+        merged = []
+        i = 0
+        j = 0
+        while i < len(first) and j < len(second):
+            if key(first[i]) >= key(second[j]):
+                merged.append(first[i])
+                i += 1
+            else:
+                merged.append(second[j])
+                j += 1
+        merged.extend(first[i:])
+        merged.extend(second[j:])
+        return merged
+
+    def compact(self):
+        """
+        Renumbers the posts in creation order, dropping retired numbers.
+        """
+
+        self.__lock.acquire()
+        try:
+            # Nothing to do if the numbers are all live and in order
+            ordered = self.__ordered == len(self.__ids)
+            if len(self.__retired) == 0 and ordered:
+                return
+
+            # Map the surviving numbers to new ones, oldest first
+            live = [number for number in xrange(len(self.__ids))
+                    if number not in self.__retired]
+            if not ordered:
+                live.sort(key = lambda n: (self.__created[n], self.__ids[n]))
+            renumber = dict([(old, new) for new, old in enumerate(live)])
+
+            # Rebuild the per-post arrays
+            self.__ids = array.array("l", [self.__ids[n] for n in live])
+            self.__groups = array.array("l", [self.__groups[n] for n in live])
+            self.__users = array.array("l", [self.__users[n] for n in live])
+            self.__created = array.array("l",
+                                         [self.__created[n] for n in live])
+            self.__bodies = [self.__bodies[n] for n in live]
+            self.__numbers = dict([(id, new) for new, id in
+                                   enumerate(self.__ids)])
+
+            # Rebuild the postings, which only need sorting again if the
+            # posts were reordered
+            postings = {}
+            for token, numbers in self.__postings.iteritems():
+                kept = [renumber[n] for n in numbers if n in renumber]
+                if not ordered:
+                    kept.sort()
+                if len(kept) > 0:
+                    postings[token] = array.array("l", kept)
+            self.__postings = postings
+            self.__retired = set()
+            self.__ordered = len(self.__ids)
+        finally:
+            self.__lock.release()
+
+    def save(self, path = None):
+        """
+        Compacts the index and writes it to the path (by default the one it
+        was created with), replacing the file atomically.
+        """
+
+        # Default to the index's own file
+        if path == None:
+            path = self.path
+
+        # Write to a temporary file, then move it into place
+        self.compact()
+        self.__lock.acquire()
+        try:
+            state = {"ids" : self.__ids.tostring(),
+                     "groups" : self.__groups.tostring(),
+                     "users" : self.__users.tostring(),
+                     "created" : self.__created.tostring(),
+                     "ordered" : self.__ordered,
+                     "bodies" : self.__bodies,
+                     "postings" : dict([(token, numbers.tostring())
+                                        for token, numbers
+                                        in self.__postings.iteritems()])}
+            output = open(path + ".tmp", "wb")
+            try:
+                cPickle.dump(state, output, cPickle.HIGHEST_PROTOCOL)
+            finally:
+                output.close()
+            os.rename(path + ".tmp", path)
+        finally:
+            self.__lock.release()
+
+    def load(self, path):
+        """
+        Replaces the index with the one saved at the path.
+        """
+
+        # Read the saved state
+        saved = open(path, "rb")
+        try:
+            state = cPickle.load(saved)
+        finally:
+            saved.close()
+
+        # Rebuild the arrays from their raw bytes
+        def unpack(data):
+            numbers = array.array("l")
+            numbers.fromstring(data)
+            return numbers
+        self.__lock.acquire()
+        try:
+            self.__clear()
+            self.__ids = unpack(state["ids"])
+            self.__groups = unpack(state["groups"])
+            self.__users = unpack(state["users"])
+            self.__created = unpack(state["created"])
+            self.__ordered = state.get("ordered", 0)
+            self.__bodies = state["bodies"]
+            self.__numbers = dict([(id, number) for number, id in
+                                   enumerate(self.__ids)])
+            self.__postings = dict([(token, unpack(numbers))
+                                    for token, numbers
+                                    in state["postings"].iteritems()])
+        finally:
+            self.__lock.release()
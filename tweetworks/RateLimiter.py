@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Pace Tweetworks API requests with a token bucket.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import threading
+import time
+
+class RateLimiter:
+    """
+    A thread-safe token bucket: tokens accumulate at rate per second, up to
+    burst, and each request spends one, waiting if none are left.
+    """
+
+    def __init__(self, rate, burst = 1):
+        """
+        rate - float - The sustained number of requests per second
+        burst - int - How many requests may be made at once after a lull
+        """
+
+        # Store the bucket options
+        self.rate = float(rate)
+        self.burst = burst
+
+        # Start with a full bucket
+        self.__tokens = float(burst)
+        self.__updated = time.time()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Spends a token, first waiting for one to accumulate if necessary.
+        Returns the number of seconds spent waiting.
+        """
+
+        # Reserve a token, possibly going into debt for it
+        self.__lock.acquire()
+        try:
+            now = time.time()
+            self.__tokens = min(self.burst, self.__tokens +
+                                (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__tokens -= 1
+            wait = max(0.0, -self.__tokens / self.rate)
+        finally:
+            self.__lock.release()
+
+        # Wait out the debt outside of the lock, so others queue behind us
+        if wait > 0:
+            time.sleep(wait)
+        return wait
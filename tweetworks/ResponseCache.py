@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Cache parsed Tweetworks API responses for read-only requests.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import threading
+import time
+import urlparse
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    Holds parsed XML responses keyed by request URL, POST data and the
+    authenticated user, for a limited time per endpoint, evicting the least
+    recently used responses when the cache is full. A cache may be shared
+    by API objects with different credentials; each user only ever sees
+    responses fetched with their own.
+
+    Endpoints are named by the first two parts of the URL path, e.g.
+    "posts/view", "groups/index" or "users/group".
+    """
+
+    def __init__(self, ttls = {}, default_ttl = 60.0, max_entries = 1000, max_bytes = None):
+        """
+        ttls - dict - Seconds to keep responses from specific endpoints; 0
+                      means never cache that endpoint
+        default_ttl - float - Seconds to keep responses from other endpoints
+        max_entries - int - The most responses to hold at once
+        max_bytes - int - The most response bytes to hold at once, if any
+        """
+
+        # Store the cache options
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # Cached responses, least recently used first, and their total size
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def endpoint(self, url):
+        """
+        Returns the endpoint name of the specified request URL.
+        """
+
+        # Use the first two path components, without any extension
+        parts = urlparse.urlparse(url).path.strip("/").split("/")[:2]
+        return "/".join(parts).replace(".xml", "")
+
+    def ttl(self, url):
+        """
+        Returns how many seconds responses from the specified URL are kept.
+        """
+
+        return self.ttls.get(self.endpoint(url), self.default_ttl)
+
+    def __key(self, url, data, user):
+        # The data must not include the API key
+        return (user, url, tuple(sorted(data.items())))
+
+    def get(self, url, data = {}, user = ""):
+        """
+        Returns the cached response for the request made as the specified
+        user ("" if unauthenticated), or None.
+        """
+
+        key = self.__key(url, data, user)
+        self.__lock.acquire()
+        try:
+            # Look for a live response
+            entry = self.__entries.pop(key, None)
+            if entry != None and entry[0] > time.time():
+                # Mark it as recently used
+                self.__entries[key] = entry
+                self.hits += 1
+                return entry[1]
+
+            # Forget an expired response
+            if entry != None:
+                self.__bytes -= entry[2]
+            self.misses += 1
+            return None
+        finally:
+            self.__lock.release()
+
+    def put(self, url, data, response, size = 0, user = ""):
+        """
+        Caches the parsed response to the request made as the specified user,
+        which was size bytes long, if its endpoint is cacheable.
+        """
+
+        # Some endpoints aren't cached at all
+        ttl = self.ttl(url)
+        if ttl <= 0:
+            return
+
+        key = self.__key(url, data, user)
+        self.__lock.acquire()
+        try:
+            # Replace any existing response
+            old = self.__entries.pop(key, None)
+            if old != None:
+                self.__bytes -= old[2]
+            self.__entries[key] = (time.time() + ttl, response, size,
+                                   self.endpoint(url))
+            self.__bytes += size
+
+            # Evict the least recently used responses until everything fits
+            while len(self.__entries) > 0 and \
+                  (len(self.__entries) > self.max_entries or
+                   (self.max_bytes != None and self.__bytes > self.max_bytes)):
+                self.__bytes -= self.__entries.popitem(last = False)[1][2]
+                self.evictions += 1
+        finally:
+            self.__lock.release()
+
+    def invalidate(self, endpoints):
+        """
+        Discards every cached response from an endpoint starting with any of
+        the specified prefixes.
+        """
+
+        self.__lock.acquire()
+        try:
+            for key, entry in self.__entries.items():
+                for prefix in endpoints:
+                    if entry[3].startswith(prefix):
+                        del self.__entries[key]
+                        self.__bytes -= entry[2]
+                        break
+        finally:
+            self.__lock.release()
+
+    def clear(self):
+        """
+        Discards every cached response.
+        """
+
+        self.__lock.acquire()
+        try:
+            self.__entries.clear()
+            self.__bytes = 0
+        finally:
+            self.__lock.release()
+
+    def stats(self):
+        """
+        Returns a dict of the cache counters and current size.
+        """
+
+        self.__lock.acquire()
+        try:
+            return {"hits" : self.hits, "misses" : self.misses,
+                    "evictions" : self.evictions,
+                    "entries" : len(self.__entries), "bytes" : self.__bytes}
+        finally:
+            self.__lock.release()
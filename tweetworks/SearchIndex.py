@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Answer Tweetworks user and group searches from a local index.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import bisect
+import re
+import threading
+import time
+
+class _TextIndex:
+    """
+    An in-memory index of objects by ID over some of their text fields,
+    supporting token, token prefix and substring queries.
+    """
+
+    # Tokens are runs of letters and digits
+    TOKEN = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, fields):
+        # The fields to index
+        self.fields = fields
+
+        # Objects, their lowercased text and their tokens, by ID
+        self.objects = {}
+        self.texts = {}
+        self.tokens = {}
+
+        # IDs by token, and the sorted tokens for prefix queries
+        self.postings = {}
+        self.__sorted = None
+
+    def put(self, obj):
+        """
+        Adds or replaces an object, reindexing it only if its text changed.
+        """
+
+        # Replace the object; its text may not have changed
+        self.objects[obj.id] = obj
+        text = u"\n".join([(getattr(obj, field) or u"").lower()
+                           for field in self.fields])
+        if self.texts.get(obj.id) == text:
+            return
+        self.remove(obj.id)
+        self.objects[obj.id] = obj
+        self.texts[obj.id] = text
+
+        # Index its tokens
+        tokens = frozenset(_TextIndex.TOKEN.findall(text))
+        self.tokens[obj.id] = tokens
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids == None:
+                self.postings[token] = ids = set()
+                self.__sorted = None
+            ids.add(obj.id)
+
+    def remove(self, id):
+        """
+        Removes an object by ID, if it is indexed.
+        """
+
+        self.objects.pop(id, None)
+        self.texts.pop(id, None)
+        for token in self.tokens.pop(id, ()):
+            ids = self.postings[token]
+            ids.discard(id)
+            if len(ids) == 0:
+                del self.postings[token]
+                self.__sorted = None
+
+    def search(self, query, mode):
+        """
+        Returns the IDs of the objects matching the query.
+        """
+
+        query = query.lower()
+
+        # Every field contains the query somewhere
+        if mode == "substring":
+            return [id for id, text in self.texts.iteritems() if query in text]
+
+        # Every query token starts a token of the object
+        tokens = _TextIndex.TOKEN.findall(query)
+        if len(tokens) == 0:
+            return []
+        if mode == "prefix":
+            matches = [self.__prefixed(token) for token in tokens]
+
+        # Every query token is a token of the object
+        elif mode == "token":
+            matches = [self.postings.get(token, set()) for token in tokens]
+        else:
+            raise ValueError("Unknown search mode %s" % mode)
+
+        # Intersect, smallest first
+        matches.sort(key = len)
+        ids = set(matches[0])
+        for match in matches[1:]:
+            ids &= match
+        return list(ids)
+
+    def __prefixed(self, prefix):
+        # Find the run of sorted tokens starting with the prefix
+        if self.__sorted == None:
+            self.__sorted = sorted(self.postings)
+        ids = set()
+        start = bisect.bisect_left(self.__sorted, prefix)
+        for token in self.__sorted[start:]:
+            if not token.startswith(prefix):
+                break
+            ids |= self.postings[token]
+        return ids
+
+class SearchIndex:
+    """
+    Answers search_users and search_groups from an in-memory index of every
+    user and group, built from index_users and index_groups, instead of
+    crawling every page of remote search results for each lookup.
+
+    Users are matched on username and name, and groups on name and
+    description, by substring, token prefix or whole token (see search_users).
+    Note that remote group searches also match post contents; local ones
+    don't.
+
+    The index is only trusted for max_age seconds after each refresh; while
+    it is stale, searches go to the API instead.
+    """
+
+    # Fields searched for each kind of object
+    USER_FIELDS = ("username", "name")
+    GROUP_FIELDS = ("name", "description")
+
+    def __init__(self, api, max_age = 3600.0):
+        """
+        api - tweetworks.API - The API to build the index and fall back to
+        max_age - float - Seconds after a refresh before the index is stale
+        """
+
+        self.api = api
+        self.max_age = max_age
+
+        # When each index was last completely refreshed
+        self.users_refreshed = None
+        self.groups_refreshed = None
+
+        # The indexes themselves
+        self.__users = _TextIndex(SearchIndex.USER_FIELDS)
+        self.__groups = _TextIndex(SearchIndex.GROUP_FIELDS)
+        self.__lock = threading.Lock()
+
+    def refresh(self, users = True, groups = True):
+        """
+        Crawls index_users and/or index_groups, adding new objects, replacing
+        changed ones (only reindexing those whose text changed) and dropping
+        those no longer listed. Searches keep being answered during the crawl.
+        """
+
+        if users:
+            self.__refresh(self.__users, self.api.iter_index_users())
+            self.users_refreshed = time.time()
+        if groups:
+            self.__refresh(self.__groups, self.api.iter_index_groups())
+            self.groups_refreshed = time.time()
+
+    def __refresh(self, index, listing):
+        # Update a page at a time, remembering every ID seen
+        seen = set()
+        page = []
+        for obj in listing:
+            seen.add(obj.id)
+            page.append(obj)
+            if len(page) >= 100:
+                self.__put(index, page)
+                page = []
+        self.__put(index, page)
+
+        # Drop whatever has disappeared
+        self.__lock.acquire()
+        try:
+            for id in set(index.objects) - seen:
+                index.remove(id)
+        finally:
+            self.__lock.release()
+
+    def __put(self, index, objects):
+        self.__lock.acquire()
+        try:
+            for obj in objects:
+                index.put(obj)
+        finally:
+            self.__lock.release()
+
+    def add_users(self, users):
+        """
+        Adds or updates users learned elsewhere, e.g. from posts, without
+        changing when the index was last refreshed.
+        """
+
+        self.__put(self.__users, users)
+
+    def add_groups(self, groups):
+        """
+        Adds or updates groups learned elsewhere without changing when the
+        index was last refreshed.
+        """
+
+        self.__put(self.__groups, groups)
+
+    def stale(self, refreshed):
+        """
+        Returns whether an index refreshed at the specified time (or never,
+        if None) is too old to trust.
+        """
+
+        return refreshed == None or time.time() - refreshed > self.max_age
+
+    def search_users(self, query, mode = "substring"):
+        """
+        Returns the users matching the query, ordered by username, from the
+        local index, or from api.search_users if the index is stale.
+
+        mode - "substring" to find the query anywhere in a username or name,
+               "prefix" for users with a word starting with each query word,
+               or "token" for users with every query word as a whole word
+        """
+
+        if self.stale(self.users_refreshed):
+            return self.api.search_users(query)
+        return self.__search(self.__users, query, mode,
+                             lambda user: user.username.lower())
+
+    def search_groups(self, query, mode = "substring"):
+        """
+        Returns the groups matching the query, ordered by name, from the
+        local index, or from api.search_groups if the index is stale. The
+        modes are as for search_users.
+        """
+
+        if self.stale(self.groups_refreshed):
+            return self.api.search_groups(query)
+        return self.__search(self.__groups, query, mode,
+                             lambda group: group.name.lower())
+
+    def __search(self, index, query, mode, order):
+        # Look up the matches
+        self.__lock.acquire()
+        try:
+            matches = [index.objects[id] for id in index.search(query, mode)]
+        finally:
+            self.__lock.release()
+
+        # Return them in a stable order
+        matches.sort(key = order)
+        return matches
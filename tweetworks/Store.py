@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Keep Tweetworks posts, users and groups in a local indexed SQLite database.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import datetime
+import sqlite3
+
+# Tweetworks includes
+import tweetworks
+
+class Store:
+    """
+    Persists Post, User and Group objects in an SQLite database, indexed for
+    the usual questions: posts by user, by group, by parent, and by creation
+    time.
+    """
+
+    # The database schema; created timestamps are kept both as the original
+    # text (to preserve the time zone) and as indexed UTC epoch seconds
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS posts (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            group_id INTEGER,
+            parent_id INTEGER,
+            twitter_id INTEGER,
+            bingo INTEGER,
+            body TEXT,
+            created TEXT,
+            created_epoch INTEGER,
+            replies INTEGER);
+        CREATE INDEX IF NOT EXISTS posts_group ON posts (group_id, created_epoch);
+        CREATE INDEX IF NOT EXISTS posts_user ON posts (user_id, created_epoch);
+        CREATE INDEX IF NOT EXISTS posts_parent ON posts (parent_id);
+        CREATE INDEX IF NOT EXISTS posts_created ON posts (created_epoch);
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT,
+            avatar_url TEXT,
+            name TEXT,
+            twitter_id INTEGER);
+        CREATE INDEX IF NOT EXISTS users_username ON users (username);
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            private INTEGER,
+            description TEXT);
+        CREATE INDEX IF NOT EXISTS groups_name ON groups (name);
+        """
+
+    # Post columns joined with their user and group
+    POST_QUERY = """
+        SELECT p.id, p.user_id, p.group_id, p.parent_id, p.twitter_id,
+               p.bingo, p.body, p.created, p.replies,
+               u.id, u.username, u.avatar_url, u.name, u.twitter_id,
+               g.id, g.name, g.private, g.description
+        FROM posts p
+        LEFT JOIN users u ON u.id = p.user_id
+        LEFT JOIN groups g ON g.id = p.group_id
+        """
+
+    def __init__(self, path = ":memory:"):
+        """
+        path - string - The SQLite database file, created if necessary
+        """
+
+        # Open the database and make sure the tables exist
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(Store.SCHEMA)
+
+    def close(self):
+        """
+        Closes the database.
+        """
+
+        self.connection.close()
+
+    def __epoch(self, created):
+        # Accept datetimes or epoch seconds
+        if isinstance(created, datetime.datetime):
+            return tweetworks.Timestamp.DEFAULT.epoch(created)
+        return created
+
+    def add_posts(self, posts):
+        """
+        Inserts or replaces the specified posts, along with their replies,
+        users and groups, in a single transaction.
+        """
+
+        # Flatten the threads and collect the embedded users and groups
+        post_rows = []
+        users = {}
+        groups = {}
+        pending = list(posts)
+        while len(pending) > 0:
+            post = pending.pop()
+            pending.extend(post.posts)
+            if post.user != None and post.user.id != None:
+                users[post.user.id] = post.user
+            if post.group != None and post.group.id != None:
+                groups[post.group.id] = post.group
+            post_rows.append((post.id, post.user_id, post.group_id,
+                              post.parent_id, post.twitter_id,
+                              int(post.bingo), post.body,
+                              str(post.created).replace(" ", "T"),
+                              self.__epoch(post.created), post.replies))
+
+        # Write everything at once
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO posts VALUES (?,?,?,?,?,?,?,?,?,?)",
+                post_rows)
+            self.__add_users(users.values())
+            self.__add_groups(groups.values())
+
+    def add_users(self, users):
+        """
+        Inserts or replaces the specified users in a single transaction.
+        """
+
+        with self.connection:
+            self.__add_users(users)
+
+    def __add_users(self, users):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO users VALUES (?,?,?,?,?)",
+            [(user.id, user.username, user.avatar_url, user.name,
+              user.twitter_id) for user in users])
+
+    def add_groups(self, groups):
+        """
+        Inserts or replaces the specified groups in a single transaction.
+        """
+
+        with self.connection:
+            self.__add_groups(groups)
+
+    def __add_groups(self, groups):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO groups VALUES (?,?,?,?)",
+            [(group.id, group.name, int(group.private), group.description)
+             for group in groups])
+
+    def __post(self, row):
+        """
+        Builds a Post, with its User and Group, from a POST_QUERY row.
+        """
+
+        # The post's own fields
+        post = tweetworks.Post()
+        (post.id, post.user_id, post.group_id, post.parent_id,
+         post.twitter_id) = row[0:5]
+        post.bingo = bool(row[5])
+        post.body = row[6]
+        post.created = tweetworks.Timestamp.DEFAULT.parse(row[7])
+        post.replies = row[8]
+
+        # The author, if stored
+        if row[9] != None:
+            post.user = self.__user(row[9:14])
+
+        # The group, if stored
+        if row[14] != None:
+            post.group = self.__group(row[14:18])
+
+        # Return the built post
+        return post
+
+    def __user(self, row):
+        user = tweetworks.User()
+        user.id, user.username, user.avatar_url, user.name, user.twitter_id = row
+        return user
+
+    def __group(self, row):
+        group = tweetworks.Group()
+        group.id, group.name, group.private, group.description = row
+        group.private = bool(group.private)
+        return group
+
+    def posts(self, user_id = None, group_id = None, parent_id = None, since = None, until = None, limit = None):
+        """
+        Returns the stored posts matching every specified criterion, newest
+        first. Replies are returned as posts of their own, not nested in
+        their parents' posts lists.
+
+        since/until - datetime or epoch seconds - Inclusive creation range
+        """
+
+        # Build the WHERE clause from the criteria
+        clauses = []
+        parameters = []
+        for column, value in (("p.user_id = ?", user_id),
+                              ("p.group_id = ?", group_id),
+                              ("p.parent_id = ?", parent_id),
+                              ("p.created_epoch >= ?", self.__epoch(since)),
+                              ("p.created_epoch <= ?", self.__epoch(until))):
+            if value != None:
+                clauses.append(column)
+                parameters.append(value)
+        query = Store.POST_QUERY
+        if len(clauses) > 0:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY p.created_epoch DESC, p.id DESC"
+        if limit != None:
+            query += " LIMIT %d" % limit
+
+        # Build the posts
+        return [self.__post(row)
+                for row in self.connection.execute(query, parameters)]
+
+    def post(self, id):
+        """
+        Returns the stored post with the specified ID, or None.
+        """
+
+        row = self.connection.execute(Store.POST_QUERY + " WHERE p.id = ?",
+                                      (id,)).fetchone()
+        if row != None:
+            return self.__post(row)
+        return None
+
+    def user(self, id):
+        """
+        Returns the stored user with the specified ID, or None.
+        """
+
+        row = self.connection.execute(
+            "SELECT id, username, avatar_url, name, twitter_id FROM users "
+            "WHERE id = ?", (id,)).fetchone()
+        if row != None:
+            return self.__user(row)
+        return None
+
+    def users(self):
+        """
+        Returns every stored user, by ID.
+        """
+
+        return [self.__user(row) for row in self.connection.execute(
+            "SELECT id, username, avatar_url, name, twitter_id FROM users "
+            "ORDER BY id")]
+
+    def group(self, id):
+        """
+        Returns the stored group with the specified ID, or None.
+        """
+
+        row = self.connection.execute(
+            "SELECT id, name, private, description FROM groups WHERE id = ?",
+            (id,)).fetchone()
+        if row != None:
+            return self.__group(row)
+        return None
+
+    def groups(self):
+        """
+        Returns every stored group, by ID.
+        """
+
+        return [self.__group(row) for row in self.connection.execute(
+            "SELECT id, name, private, description FROM groups ORDER BY id")]
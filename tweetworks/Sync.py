@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Incrementally fetch new Tweetworks posts, remembering what has been seen.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import os
+import json
+
+class Sync:
+    """
+    Fetches only the posts that are new since the last run for a set of feeds:
+    groups (group_posts), users' contributions (contributed_posts), users'
+    joined groups (joined_groups_posts) and the public index (index_posts).
+
+    The newest post ID seen in each feed is kept in a small JSON state file,
+    and passed back to Tweetworks as after_id on the next run. The first run
+    of a feed fetches all of it.
+    """
+
+    def __init__(self, api, state_file = None, groups = [], users = [], joined = [], index = False):
+        """
+        api - tweetworks.API - The API to fetch posts with
+        state_file - string - Where to keep the high-water marks between runs;
+                              if None, they are only kept in memory
+        groups - string[] - Names of groups whose posts to follow
+        users - string[] - Usernames whose contributed posts to follow
+        joined - string[] - Usernames whose joined groups' posts to follow
+        index - boolean - Whether to follow the public index of all posts
+        """
+
+        # Store the API and where to keep state
+        self.api = api
+        self.state_file = state_file
+
+        # Build the list of feeds as (feed name, listing method, argument)
+        self.feeds = []
+        for group in groups:
+            self.feeds.append(("group/%s" % group,
+                               api.iter_group_posts, group))
+        for username in users:
+            self.feeds.append(("contributed/%s" % username,
+                               api.iter_contributed_posts, username))
+        for username in joined:
+            self.feeds.append(("joined_groups/%s" % username,
+                               api.iter_joined_groups_posts, username))
+        if index:
+            self.feeds.append(("index", api.iter_index_posts, None))
+
+        # Load the marks from the last run, if any
+        self.state = {}
+        if state_file != None and os.path.exists(state_file):
+            state = open(state_file)
+            try:
+                self.state = json.load(state)
+            finally:
+                state.close()
+
+    def mark(self, feed, updated = False):
+        """
+        Returns the high-water post ID for the named feed and sort order, or
+        None if the feed has never been synced.
+        """
+
+        return self.state.get(feed, {}).get(("newest", "updated")[updated])
+
+    def run(self, updated = False):
+        """
+        Fetches the new posts from every feed, and returns a dict of feed name
+        to a list of new posts, newest first.
+
+        If updated is True, feeds are read in last-updated order instead, so
+        that old threads with new replies are picked up as well; this keeps
+        its own mark, separate from the newest-first one.
+
+        Each feed's mark is saved as soon as that feed has been completely
+        fetched, so a failure part way through a run loses no progress.
+        """
+
+        # Sync each feed in turn
+        results = {}
+        order = ("newest", "updated")[updated]
+        for feed, listing, argument in self.feeds:
+            # Only ask for posts after the mark
+            mark = self.mark(feed, updated)
+            if argument != None:
+                posts = list(listing(argument, sort_by_updated = updated,
+                                     after_id = mark))
+            else:
+                posts = list(listing(sort_by_updated = updated,
+                                     after_id = mark))
+            results[feed] = posts
+
+            # Move the mark up to the newest post we got
+            if len(posts) > 0:
+                if updated:
+                    # The most recently updated post comes first
+                    newest = posts[0].id
+                else:
+                    newest = max([post.id for post in posts])
+                self.state.setdefault(feed, {})[order] = newest
+                self.save()
+
+        # Return the new posts by feed
+        return results
+
+    def save(self):
+        """
+        Writes the marks to the state file, if there is one. The file is
+        replaced atomically so that it is never left half written.
+        """
+
+        # Nothing to do for in-memory state
+        if self.state_file == None:
+            return
+
+        # Write a temporary file and move it into place
+        temporary = "%s.tmp" % self.state_file
+        state = open(temporary, "w")
+        try:
+            json.dump(self.state, state, indent = 1, sort_keys = True)
+        finally:
+            state.close()
+        os.rename(temporary, self.state_file)
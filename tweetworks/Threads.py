@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Rebuild threaded Tweetworks discussions from flat lists of posts.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# Tweetworks includes
+import tweetworks
+
+class Threads:
+    """
+    Links any collection of posts, such as the flat results of group_posts or
+    index_posts, into reply trees: each post's posts list is filled with its
+    known replies (oldest first) and its replies count is raised to match.
+
+    Posts whose parents aren't in the collection can have their discussions
+    fetched with fetch_missing, one view_posts request per missing parent
+    rather than one per thread.
+    """
+
+    def __init__(self, posts = []):
+        """
+        posts - tweetworks.Post[] - The posts to thread, including any replies
+                                    already nested in them
+        """
+
+        # Every known post by ID
+        self.posts = {}
+
+        # Parent IDs that could not be fetched
+        self.unresolved = set()
+
+        # The top-level posts, newest first
+        self.roots = []
+
+        # Index and link the posts
+        self.add(posts)
+
+    def add(self, posts):
+        """
+        Adds more posts, and their nested replies, and relinks the threads.
+        """
+
+        # Index the posts and everything nested in them
+        pending = list(posts)
+        while len(pending) > 0:
+            post = pending.pop()
+            pending.extend(post.posts)
+            self.posts[post.id] = post
+
+        # Relink everything
+        self.__link()
+
+    def __link(self):
+        """
+        Rebuilds every post's replies and the list of roots in O(n).
+        """
+
+        # Group the posts by parent
+        children = {}
+        roots = []
+        for post in self.posts.itervalues():
+            if post.parent_id != None and post.parent_id in self.posts:
+                children.setdefault(post.parent_id, []).append(post)
+            else:
+                roots.append(post)
+
+        # Attach each post's replies, oldest first
+        for post in self.posts.itervalues():
+            replies = children.get(post.id, [])
+            replies.sort(key = lambda reply: reply.id)
+            post.posts = replies
+            post.replies = max(post.replies, len(replies))
+
+        # The remaining posts start threads, newest first
+        roots.sort(key = lambda root: root.id, reverse = True)
+        self.roots = roots
+
+    def missing_parent_ids(self):
+        """
+        Returns the set of IDs of parents that are referred to by known posts
+        but aren't known themselves, not counting those that couldn't be
+        fetched.
+        """
+
+        return set([post.parent_id for post in self.posts.itervalues()
+                    if post.parent_id != None and
+                    post.parent_id not in self.posts]) - self.unresolved
+
+    def fetch_missing(self, api, max_workers = None):
+        """
+        Fetches the discussion of every missing parent with api.view_posts,
+        repeating for parents that turn out to be replies themselves, and
+        relinks the threads. Parents that can't be fetched (e.g. deleted
+        posts), or whose fetched discussions don't include them, are left out
+        and recorded in unresolved.
+
+        max_workers - How many discussions to fetch at once (the API default
+                      if None).
+
+        Returns the number of view_posts requests made.
+        """
+
+        # Use the API-wide concurrency unless overridden
+        if max_workers == None:
+            max_workers = api.max_workers
+
+        # Fetch one discussion, noting failures rather than giving up
+        def view(id):
+            try:
+                return api.view_posts(id)
+            except api.TweetworksException:
+                return None
+
+        # Keep going until every parent is known or unfetchable
+        requests = 0
+        missing = sorted(self.missing_parent_ids())
+        while len(missing) > 0:
+            # Fetch this round of parents
+            discussions = tweetworks.WorkerPool(max_workers).map(view, missing)
+            requests += len(missing)
+
+            # Record what we learned; a parent that still isn't known, even
+            # though its discussion was fetched, won't be found by asking again
+            self.add([discussion for discussion in discussions
+                      if discussion != None])
+            for id in missing:
+                if id not in self.posts:
+                    self.unresolved.add(id)
+
+            # Their own parents may be missing too
+            missing = sorted(self.missing_parent_ids())
+
+        # Return how many requests it took
+        return requests
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Parse Tweetworks timestamps quickly.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import calendar
+import datetime
+import iso8601
+
+class Timestamp:
+    """
+    Parses the fixed timestamp layout Tweetworks sends, e.g.
+    2009-06-19T12:00:10-04:00 (or with a trailing Z for UTC), by slicing
+    rather than with a regular expression, and remembers recent results since
+    posts on the same page often share timestamps. Anything else is handed to
+    iso8601.parse_date, so the results are always the same as iso8601's.
+
+    Timestamp.DEFAULT is shared by the models.
+    """
+
+    def __init__(self, cache_size = 1024):
+        """
+        cache_size - int - How many recently parsed timestamps to remember;
+                           0 disables the cache
+        """
+
+        self.cache_size = cache_size
+
+        # Parsed datetimes by text, and time zones by offset text
+        self.__cache = {}
+        self.__zones = {"Z" : iso8601.iso8601.UTC}
+
+    def parse(self, text):
+        """
+        Returns the timezone-aware datetime for the timestamp text.
+        """
+
+        # Reuse a recent result; datetimes are immutable, so sharing is safe
+        parsed = self.__cache.get(text)
+        if parsed != None:
+            return parsed
+
+        # Parse it, falling back to iso8601 for any other layout, or for
+        # fields out of range, so that it raises its own error
+        fields = self.__fields(text)
+        parsed = None
+        if fields != None:
+            try:
+                parsed = datetime.datetime(fields[0], fields[1], fields[2],
+                                           fields[3], fields[4], fields[5],
+                                           0, self.__zone(text[19:]))
+            except ValueError:
+                pass
+        if parsed == None:
+            parsed = iso8601.parse_date(text)
+
+        # Remember it, starting over once the cache is full
+        if self.cache_size > 0:
+            if len(self.__cache) >= self.cache_size:
+                self.__cache.clear()
+            self.__cache[text] = parsed
+        return parsed
+
+    def parse_many(self, texts, epoch = False):
+        """
+        Returns the list of datetimes, or if epoch is True UTC epoch seconds,
+        for a list of timestamp texts, such as the created fields of a page
+        of posts. Epoch seconds are computed without building datetimes.
+        """
+
+        # Datetimes, through the cache
+        if not epoch:
+            return [self.parse(text) for text in texts]
+
+        # Epoch seconds, straight from the fields where possible; timegm
+        # doesn't check them, so a naive datetime does
+        results = []
+        for text in texts:
+            fields = self.__fields(text)
+            if fields != None:
+                try:
+                    datetime.datetime(*fields[:6])
+                except ValueError:
+                    fields = None
+            if fields == None:
+                results.append(self.epoch(iso8601.parse_date(text)))
+            else:
+                results.append(calendar.timegm(fields) - fields[6])
+        return results
+
+    def epoch(self, created):
+        """
+        Returns the UTC epoch seconds of a datetime, treating naive datetimes
+        as UTC.
+        """
+
+        if created.tzinfo == None:
+            created = created.replace(tzinfo = iso8601.iso8601.UTC)
+        return calendar.timegm(created.utctimetuple())
+
+    def from_epoch(self, epoch):
+        """
+        Returns the UTC datetime for epoch seconds.
+        """
+
+        return datetime.datetime.utcfromtimestamp(epoch).replace(
+            tzinfo = iso8601.iso8601.UTC)
+
+    def __fields(self, text):
+        """
+        Returns the year, month, day, hour, minute, second and UTC offset
+        seconds of a timestamp in the Tweetworks layout, or None.
+        """
+
+        # Check the layout: YYYY-MM-DDTHH:MM:SS then Z or +HH:MM/-HH:MM
+        length = len(text)
+        if not ((length == 25 and text[19] in "+-" and text[22] == ":") or
+                (length == 20 and text[19] == "Z")):
+            return None
+        if (text[4] != "-" or text[7] != "-" or text[10] not in "T " or
+            text[13] != ":" or text[16] != ":"):
+            return None
+
+        # Every field must be ASCII digits alone; int would also take spaces,
+        # signs and other scripts' digits
+        digits = (text[0:4] + text[5:7] + text[8:10] + text[11:13] +
+                  text[14:16] + text[17:19] + text[20:22] + text[23:25])
+        if digits.strip("0123456789") != "":
+            return None
+
+        # Read the numbers
+        offset = 0
+        if length == 25:
+            offset = int(text[20:22]) * 3600 + int(text[23:25]) * 60
+            if text[19] == "-":
+                offset = -offset
+        return (int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                int(text[11:13]), int(text[14:16]), int(text[17:19]), offset)
+
+    def __zone(self, offset):
+        """
+        Returns the shared time zone for an offset such as -04:00 or Z.
+        """
+
+        zone = self.__zones.get(offset)
+        if zone == None:
+            sign = (1, -1)[offset[0] == "-"]
+            zone = iso8601.iso8601.FixedOffset(sign * int(offset[1:3]),
+                                               sign * int(offset[4:6]),
+                                               offset)
+            self.__zones[offset] = zone
+        return zone
+
+# The parser shared by the models
+Timestamp.DEFAULT = Timestamp()
@@ -41,11 +41,14 @@ The term "Twitter" is Copyright © 2009 Twitter, Inc.
 import lxml.etree
 from lxml.builder import E
 
-class User:
+class User(object):
     """
     Represents the data fields of a single Tweetworks user.
     """
 
+    # Users are embedded in every post, so don't give each one a __dict__
+    __slots__ = ("id", "username", "avatar_url", "name", "twitter_id")
+
     def __init__(self, xml = None):
         """
         Reads user fields from the XML, or create an empty user.
@@ -61,27 +64,68 @@ class User:
             self.id = None
             self.username = ""
             self.avatar_url = ""
+            self.name = ""
             self.twitter_id = None
             return
 
-        # User ID
-        self.id = int(xml.xpath("/user/id/text()")[0])
+        # Read fields relative to the <user> element itself, which may be
+        # nested in a larger document; no need to copy it out first
+        if hasattr(xml, "getroot"):
+            xml = xml.getroot()
 
-        # User's Twitter username
-        self.username = unicode(xml.xpath("/user/username/text()")[0])
+        # Twitter ID of the user; this should always be present but isn't always
+        self.twitter_id = None
+
+        # Text fields default to empty, as an empty element has no text
+        self.username = u""
+        self.avatar_url = u""
+        self.name = u""
+
+        # Read every field in a single pass over the child elements
+        for child in xml:
+            tag = child.tag
+            text = child.text
+
+            # User ID
+            if tag == "id":
+                self.id = int(text)
+
+            # User's Twitter username
+            elif tag == "username":
+                if text != None:
+                    self.username = unicode(text)
+
+            # User avatar URL (loaded from Amazon S3, obtained from Twitter)
+            elif tag == "avatar_url":
+                if text != None:
+                    self.avatar_url = unicode(text)
+
+            # User's "real" name
+            elif tag == "name":
+                if text != None:
+                    self.name = unicode(text)
+
+            # Twitter ID of the user, if present
+            elif tag == "twitter_id":
+                if text != None:
+                    self.twitter_id = int(text)
+
+    def __getstate__(self):
+        """
+        Returns the fields that have been set, for pickling; classes with
+        __slots__ have no __dict__ for pickle to save.
+        """
 
-        # User avatar URL (loaded from Amazon S3, obtained from Twitter)
-        self.avatar_url = unicode(xml.xpath("/user/avatar_url/text()")[0])
+        return dict([(name, getattr(self, name)) for name in User.__slots__
+                     if hasattr(self, name)])
 
-        # User's "real" name
-        self.name = unicode(xml.xpath("/user/name/text()")[0])
+    def __setstate__(self, state):
+        """
+        Restores the fields saved by __getstate__.
+        """
 
-        # Twitter ID of the user; this should always be present but isn't always
-        twitter_id = xml.xpath("/user/twitter_id/text()")
-        if len(twitter_id) == 1:
-            self.twitter_id = int(twitter_id[0])
-        else:
-            self.twitter_id = None
+        for name, value in state.iteritems():
+            setattr(self, name, value)
 
     def __str__(self):
         """
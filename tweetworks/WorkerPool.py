@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Run independent Tweetworks API requests on a bounded set of threads.
+
+Nicolas Ward
+@ultranurd
+ultranurd@yahoo.com
+http://www.ultranurd.net/code/tweetworks/
+2026.10.18
+"""
+
+"""
+This file is part of the Tweetworks Python API.
+
+Copyright © 2009 Nicolas Ward
+
+Tweetworks Python API is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Tweetworks Python API is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with the Tweetworks Python API. If not, see http://www.gnu.org/licenses/
+
+The term "Tweetworks" is Copyright © 2009 Tweetworks, LLC and is used
+under license. See http://www.tweetworks.com/pages/terms
+
+The use of this software requires a unique Tweetworks API key. You must be a
+registered Tweetworks user, and have received an API key after requesting one
+via http://www.tweetworks.com/pages/contact.
+
+The term "Twitter" is Copyright © 2009 Twitter, Inc.
+"""
+
+# System includes
+import sys
+import threading
+import Queue
+
+class Future:
+    """
+    The eventual result of a call submitted to a WorkerPool.
+    """
+
+    def __init__(self):
+        self.__done = threading.Event()
+        self.__result = None
+        self.__error = None
+        self.__callbacks = []
+        self.__lock = threading.Lock()
+
+    def done(self):
+        """
+        Returns whether the call has finished.
+        """
+
+        return self.__done.is_set()
+
+    def result(self, timeout = None):
+        """
+        Waits for the call to finish and returns its result, or re-raises its
+        exception. Raises Queue.Empty if the timeout (in seconds) expires.
+        """
+
+        # Wait for the call
+        if not self.__done.wait(timeout):
+            raise Queue.Empty("Timed out waiting for result")
+
+        # Re-raise a failure with its original traceback
+        if self.__error != None:
+            raise self.__error[0], self.__error[1], self.__error[2]
+        return self.__result
+
+    def exception(self, timeout = None):
+        """
+        Waits for the call to finish and returns its exception, or None.
+        """
+
+        if not self.__done.wait(timeout):
+            raise Queue.Empty("Timed out waiting for result")
+        if self.__error != None:
+            return self.__error[1]
+        return None
+
+    def add_done_callback(self, callback):
+        """
+        Calls callback(future) when the call finishes, on the worker thread,
+        or immediately if it already has.
+        """
+
+        self.__lock.acquire()
+        try:
+            if not self.__done.is_set():
+                self.__callbacks.append(callback)
+                return
+        finally:
+            self.__lock.release()
+        callback(self)
+
+    def _finish(self, result = None, error = None):
+        # Store the outcome and wake anyone waiting on it
+        self.__lock.acquire()
+        try:
+            self.__result = result
+            self.__error = error
+            self.__done.set()
+            callbacks = self.__callbacks
+            self.__callbacks = []
+        finally:
+            self.__lock.release()
+
+        # Run the callbacks outside of the lock
+        for callback in callbacks:
+            callback(self)
+
+class WorkerPool:
+    """
+    Applies a function to a list of items using at most max_workers threads,
+    or runs individual submitted calls on up to max_workers long-lived
+    threads.
+    """
+
+    def __init__(self, max_workers = 1):
+        """
+        max_workers - int - The most items that may be processed at once; 1
+                            processes the items in order on the calling thread
+        """
+
+        self.max_workers = max_workers
+
+        # Submitted calls, and the threads started so far to run them
+        self.__queue = Queue.Queue()
+        self.__threads = []
+        self.__lock = threading.Lock()
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Schedules function(*args, **kwargs) to run on one of the pool's
+        threads, and returns a Future for its result. At most max_workers
+        calls run at once; the rest wait their turn.
+        """
+
+        # Queue the call
+        future = Future()
+        self.__queue.put((future, function, args, kwargs))
+
+        # Start another thread if we haven't reached the limit
+        self.__lock.acquire()
+        try:
+            if len(self.__threads) < max(1, self.max_workers):
+                thread = threading.Thread(target = self.__serve)
+                thread.daemon = True
+                thread.start()
+                self.__threads.append(thread)
+        finally:
+            self.__lock.release()
+
+        # Return the pending result
+        return future
+
+    def __serve(self):
+        """
+        Runs submitted calls until the pool is shut down.
+        """
+
+        while True:
+            # Wait for the next call; None means shut down
+            task = self.__queue.get()
+            if task == None:
+                return
+
+            # Run it and record the outcome
+            future, function, args, kwargs = task
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                future._finish(error = sys.exc_info())
+            else:
+                future._finish(result)
+
+            # Don't keep the call's objects alive while waiting for the next
+            task = future = function = args = kwargs = result = None
+
+    def shutdown(self, wait = True):
+        """
+        Stops the pool's threads once the calls already submitted have run.
+        """
+
+        # One stop marker per thread, behind any queued calls
+        self.__lock.acquire()
+        try:
+            threads = self.__threads
+            self.__threads = []
+        finally:
+            self.__lock.release()
+        for thread in threads:
+            self.__queue.put(None)
+
+        # Wait for them to finish
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def map(self, function, items):
+        """
+        Returns the list of function(item) results, in the same order as the
+        items. If any call raises an exception, no further items are started
+        and the first exception raised is re-raised once the calls already in
+        progress have finished.
+        """
+
+        # Nothing to gain from threads for a single worker or item
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+
+        # Shared state: the results, the next item to start, and the first error
+        results = [None] * len(items)
+        state = {"next" : 0, "error" : None}
+        lock = threading.Lock()
+
+        def work():
+            while True:
+                # Claim the next item, unless we're done or something failed
+                lock.acquire()
+                try:
+                    index = state["next"]
+                    if index >= len(items) or state["error"] != None:
+                        return
+                    state["next"] = index + 1
+                finally:
+                    lock.release()
+
+                # Process it, remembering only the first failure
+                try:
+                    results[index] = function(items[index])
+                except Exception:
+                    lock.acquire()
+                    try:
+                        if state["error"] == None:
+                            state["error"] = sys.exc_info()
+                    finally:
+                        lock.release()
+                    return
+
+        # Run the workers to completion
+        threads = [threading.Thread(target = work)
+                   for i in range(min(self.max_workers, len(items)))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Re-raise the first failure with its original traceback
+        if state["error"] != None:
+            error = state["error"]
+            raise error[0], error[1], error[2]
+
+        # Return the results in item order
+        return results
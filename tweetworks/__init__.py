@@ -41,6 +41,21 @@ The term "Twitter" is Copyright © 2009 Twitter, Inc.
 
 # Explicitly import each module's classes into the package namespace
 from API import *
+from Archive import *
+from AsyncAPI import *
+from ConnectionPool import *
 from Group import *
+from IdentityMap import *
+from Metrics import *
 from Post import *
+from PostBatch import *
+from PostIndex import *
+from RateLimiter import *
+from ResponseCache import *
+from SearchIndex import *
+from Store import *
+from Sync import *
+from Threads import *
+from Timestamp import *
 from User import *
+from WorkerPool import *